@@ -0,0 +1,160 @@
+"""Benchmark the /articles date filter: DATE(updated)=%s vs the indexed updated_date column.
+
+Creates two scratch tables next to the configured one (same schema, one without the
+updated_date column/index, one with it), fills both with the same synthetic rows spread
+over --days days, then times the COUNT + page query that /articles runs against each.
+
+Example: python bench_articles.py --rows 1000000 --repeat 20
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+import aiomysql
+
+from data_api import Config
+
+OLD_QUERY_WHERE = "DATE(updated)=%s"
+NEW_QUERY_WHERE = "updated_date=%s"
+
+
+def table_ddl(name: str, indexed: bool) -> str:
+    extra = (
+        """,
+        updated_date DATE AS (DATE(updated)) STORED,
+        KEY idx_updated_date (updated_date, updated)"""
+        if indexed
+        else ""
+    )
+    return f"""
+    CREATE TABLE {name} (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        authors TEXT,
+        categories TEXT,
+        comment TEXT,
+        entry_id VARCHAR(255),
+        journal_ref VARCHAR(255),
+        summary TEXT,
+        title VARCHAR(255),
+        updated DATETIME,
+        CN_title TEXT,
+        CN_summary TEXT{extra}
+    )
+    """
+
+
+def fake_rows(count: int, days: int, start: datetime, seed: int):
+    rng = random.Random(seed)
+    cats = ["cs.AI", "cs.CR", "cs.LG", "cs.CL", "stat.ML"]
+    for i in range(count):
+        updated = start + timedelta(seconds=rng.randrange(days * 86400))
+        yield (
+            f"Author {i}",
+            ",".join(rng.sample(cats, 2)),
+            "",
+            f"http://arxiv.org/abs/bench.{i:08d}v1",
+            "",
+            "lorem ipsum " * 20,
+            f"Synthetic article {i}",
+            updated,
+            f"合成文章 {i}",
+            "摘要 " * 40,
+        )
+
+
+async def populate(pool, name: str, rows: int, days: int, start: datetime, batch: int):
+    insert = f"""
+        INSERT INTO {name}
+        (authors, categories, comment, entry_id, journal_ref, summary, title, updated, CN_title, CN_summary)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """
+    async with pool.acquire() as conn:
+        async with conn.cursor() as cur:
+            chunk = []
+            for row in fake_rows(rows, days, start, seed=42):
+                chunk.append(row)
+                if len(chunk) >= batch:
+                    await cur.executemany(insert, chunk)
+                    chunk = []
+            if chunk:
+                await cur.executemany(insert, chunk)
+        await conn.commit()
+
+
+async def time_articles(pool, name: str, where: str, dates, repeat: int, page_size: int):
+    samples = []
+    async with pool.acquire() as conn:
+        async with conn.cursor(aiomysql.DictCursor) as cur:
+            for _ in range(repeat):
+                date = random.choice(dates)
+                started = time.perf_counter()
+                await cur.execute(f"SELECT COUNT(*) AS count FROM {name} WHERE {where}", (date,))
+                await cur.fetchone()
+                await cur.execute(
+                    f"""
+                    SELECT title, summary, authors, categories, comment, entry_id,
+                           journal_ref, updated, CN_title, CN_summary
+                    FROM {name}
+                    WHERE {where}
+                    ORDER BY updated DESC
+                    LIMIT %s OFFSET %s
+                    """,
+                    (date, page_size, 0),
+                )
+                await cur.fetchall()
+                samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def summarize(label: str, samples):
+    samples = sorted(samples)
+    p95 = samples[max(0, int(len(samples) * 0.95) - 1)]
+    print(f"{label:<28} median {statistics.median(samples):8.1f} ms   p95 {p95:8.1f} ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark /articles date filtering")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--page-size", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=5000)
+    parser.add_argument("--keep", action="store_true", help="keep the scratch tables afterwards")
+    args = parser.parse_args()
+
+    config = Config()
+    base = config.articles_table()
+    old_table, new_table = f"{base}_bench_old", f"{base}_bench_new"
+    start = datetime(2024, 1, 1)
+    dates = [(start + timedelta(days=d)).strftime("%Y-%m-%d") for d in range(args.days)]
+
+    pool = await aiomysql.create_pool(**config.db_config())
+    try:
+        async with pool.acquire() as conn:
+            async with conn.cursor() as cur:
+                for name, indexed in ((old_table, False), (new_table, True)):
+                    await cur.execute(f"DROP TABLE IF EXISTS {name}")
+                    await cur.execute(table_ddl(name, indexed))
+
+        for name in (old_table, new_table):
+            started = time.perf_counter()
+            await populate(pool, name, args.rows, args.days, start, args.batch)
+            print(f"populated {name} with {args.rows} rows in {time.perf_counter() - started:.1f}s")
+
+        summarize("before: DATE(updated)=%s", await time_articles(pool, old_table, OLD_QUERY_WHERE, dates, args.repeat, args.page_size))
+        summarize("after: updated_date=%s", await time_articles(pool, new_table, NEW_QUERY_WHERE, dates, args.repeat, args.page_size))
+    finally:
+        if not args.keep:
+            async with pool.acquire() as conn:
+                async with conn.cursor() as cur:
+                    await cur.execute(f"DROP TABLE IF EXISTS {old_table}")
+                    await cur.execute(f"DROP TABLE IF EXISTS {new_table}")
+        pool.close()
+        await pool.wait_closed()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
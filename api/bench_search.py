@@ -0,0 +1,184 @@
+"""Benchmark /search: latency of the full-text query path with and without facets.
+
+Creates a scratch articles table with the two FULLTEXT indexes and a scratch category
+table next to the configured ones, fills them with synthetic rows whose titles and
+abstracts draw words from a Zipf-like vocabulary, then times data_api.load_search
+(the code /search runs on a cache miss) for random one- and two-word queries.
+
+Example: python bench_search.py --rows 500000 --repeat 50
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+import aiomysql
+
+import data_api
+from data_api import Config
+
+CATEGORIES = ["cs.AI", "cs.CR", "cs.LG", "cs.CL", "stat.ML"]
+CJK_WORDS = ["神经网络", "强化学习", "语言模型", "图像分割", "对抗样本", "联邦学习", "知识蒸馏", "因果推断"]
+
+
+def table_ddl(name: str) -> str:
+    return f"""
+    CREATE TABLE {name} (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        authors TEXT,
+        categories TEXT,
+        comment TEXT,
+        entry_id VARCHAR(255),
+        journal_ref VARCHAR(255),
+        summary TEXT,
+        title VARCHAR(255),
+        updated DATETIME,
+        updated_date DATE AS (DATE(updated)) STORED,
+        CN_title TEXT,
+        CN_summary TEXT,
+        KEY idx_updated_date (updated_date, updated)
+    )
+    """
+
+
+def category_ddl(name: str) -> str:
+    return f"""
+    CREATE TABLE {name} (
+        article_id INT NOT NULL,
+        category VARCHAR(64) NOT NULL,
+        updated_date DATE NOT NULL,
+        PRIMARY KEY (article_id, category),
+        KEY idx_category_date (category, updated_date)
+    )
+    """
+
+
+def vocabulary(size: int, seed: int):
+    rng = random.Random(seed)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(letters) for _ in range(rng.randint(4, 10))))
+    return sorted(words)
+
+
+def fake_rows(count: int, days: int, start: datetime, words, seed: int):
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(words))]
+    for i in range(count):
+        updated = start + timedelta(seconds=rng.randrange(days * 86400))
+        title = " ".join(rng.choices(words, weights, k=8))
+        summary = " ".join(rng.choices(words, weights, k=120))
+        cn = "".join(rng.sample(CJK_WORDS, 3))
+        yield (
+            f"Author {i}",
+            ",".join(rng.sample(CATEGORIES, 2)),
+            "",
+            f"http://arxiv.org/abs/bench.{i:08d}v1",
+            "",
+            summary,
+            title,
+            updated,
+            cn,
+            cn * 10,
+        )
+
+
+async def populate(pool, name: str, category_name: str, rows: int, days: int, start: datetime, words, batch: int):
+    insert = f"""
+        INSERT INTO {name}
+        (authors, categories, comment, entry_id, journal_ref, summary, title, updated, CN_title, CN_summary)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """
+    async with pool.acquire() as conn:
+        async with conn.cursor() as cur:
+            chunk = []
+            for row in fake_rows(rows, days, start, words, seed=42):
+                chunk.append(row)
+                if len(chunk) >= batch:
+                    await cur.executemany(insert, chunk)
+                    chunk = []
+            if chunk:
+                await cur.executemany(insert, chunk)
+            await cur.execute(
+                f"""
+                INSERT INTO {category_name} (article_id, category, updated_date)
+                SELECT a.id, jt.category, a.updated_date FROM {name} a,
+                JSON_TABLE(CONCAT('["', REPLACE(a.categories, ',', '","'), '"]'), '$[*]' COLUMNS (category VARCHAR(64) PATH '$')) jt
+                """
+            )
+            await cur.execute(f"ALTER TABLE {name} ADD FULLTEXT INDEX ft_title_summary (title, summary)")
+            await cur.execute(
+                f"ALTER TABLE {name} ADD FULLTEXT INDEX ft_cn_title_summary (CN_title, CN_summary) WITH PARSER ngram"
+            )
+        await conn.commit()
+
+
+async def time_search(queries, facets: bool, page_size: int):
+    samples = []
+    for query in queries:
+        started = time.perf_counter()
+        await data_api.load_search(query, None, None, [], 1, page_size, facets)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def summarize(label: str, samples):
+    samples = sorted(samples)
+    p95 = samples[max(0, int(len(samples) * 0.95) - 1)]
+    print(f"{label:<28} p50 {statistics.median(samples):8.1f} ms   p95 {p95:8.1f} ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark /search")
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--vocabulary", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--batch", type=int, default=5000)
+    parser.add_argument("--keep", action="store_true", help="keep the scratch tables afterwards")
+    args = parser.parse_args()
+
+    config = Config()
+    name = f"{config.articles_table()}_bench_search"
+    category_name = f"{name}_categories"
+    words = vocabulary(args.vocabulary, seed=7)
+    rng = random.Random(1)
+    # Common words return thousands of matches (the facet cap), rarer ones a handful
+    english = [" ".join(rng.sample(words[:2000], rng.randint(1, 2))) for _ in range(args.repeat)]
+    chinese = [rng.choice(CJK_WORDS) for _ in range(args.repeat)]
+
+    pool = await aiomysql.create_pool(**config.db_config())
+    data_api.app.state.pool = pool
+    data_api.app.state.table = name
+    data_api.app.state.category_table = category_name
+    try:
+        async with pool.acquire() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(f"DROP TABLE IF EXISTS {name}")
+                await cur.execute(f"DROP TABLE IF EXISTS {category_name}")
+                await cur.execute(table_ddl(name))
+                await cur.execute(category_ddl(category_name))
+
+        started = time.perf_counter()
+        await populate(pool, name, category_name, args.rows, args.days, datetime(2024, 1, 1), words, args.batch)
+        print(f"populated {name} with {args.rows} rows in {time.perf_counter() - started:.1f}s")
+
+        summarize("english, facets", await time_search(english, True, args.page_size))
+        summarize("english, no facets", await time_search(english, False, args.page_size))
+        summarize("chinese, facets", await time_search(chinese, True, args.page_size))
+    finally:
+        if not args.keep:
+            async with pool.acquire() as conn:
+                async with conn.cursor() as cur:
+                    await cur.execute(f"DROP TABLE IF EXISTS {name}")
+                    await cur.execute(f"DROP TABLE IF EXISTS {category_name}")
+        pool.close()
+        await pool.wait_closed()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,93 @@
+"""Load test the /sync endpoints with many concurrent clients.
+
+Each client repeatedly PUTs an encrypted-looking blob under its own id and reads it
+back (GET), like a browser syncing favorites. Prints throughput and latency per
+operation. Needs a running data_api.py; httpx is in requirements.txt.
+
+Example: python bench_sync.py --clients 300 --duration 30
+"""
+import argparse
+import asyncio
+import base64
+import os
+import statistics
+import time
+import uuid
+
+import httpx
+
+from data_api import Config
+
+
+def fake_payload(size: int) -> dict:
+    return {
+        "ciphertext": base64.b64encode(os.urandom(size)).decode("ascii"),
+        "salt": base64.b64encode(os.urandom(16)).decode("ascii"),
+        "iv": base64.b64encode(os.urandom(12)).decode("ascii"),
+    }
+
+
+async def sync_client(client: httpx.AsyncClient, deadline: float, payload_size: int, samples: dict, errors: list):
+    # Built once: generating and encoding a fresh payload per PUT would run on the same
+    # event loop that times the requests and inflate the latencies
+    sync_id = uuid.uuid4().hex
+    payload = fake_payload(payload_size)
+    while time.perf_counter() < deadline:
+        for op in ("put", "get"):
+            started = time.perf_counter()
+            try:
+                if op == "put":
+                    resp = await client.put(f"/sync/{sync_id}", json=payload)
+                else:
+                    resp = await client.get(f"/sync/{sync_id}")
+                resp.raise_for_status()
+            except httpx.HTTPError as exc:
+                errors.append(f"{op}: {exc}")
+                break  # a GET after a failed PUT would only 404 and count the failure twice
+            samples[op].append((time.perf_counter() - started) * 1000)
+
+
+def summarize(label: str, samples, elapsed: float):
+    if not samples:
+        print(f"{label:<5} no successful requests")
+        return
+    samples = sorted(samples)
+    p95 = samples[max(0, int(len(samples) * 0.95) - 1)]
+    p99 = samples[max(0, int(len(samples) * 0.99) - 1)]
+    print(
+        f"{label:<5} {len(samples) / elapsed:8.1f} req/s   median {statistics.median(samples):7.1f} ms"
+        f"   p95 {p95:7.1f} ms   p99 {p99:7.1f} ms"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Load test /sync with concurrent clients")
+    parser.add_argument("--url", default=None, help="API base URL (default http://127.0.0.1:<[server] port>)")
+    parser.add_argument("--clients", type=int, default=300)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--payload-bytes", type=int, default=20_000, help="raw ciphertext size per PUT")
+    args = parser.parse_args()
+
+    base_url = args.url or f"http://127.0.0.1:{Config().server_port()}"
+    limits = httpx.Limits(max_connections=args.clients, max_keepalive_connections=args.clients)
+    samples = {"put": [], "get": []}
+    errors = []
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(
+            *(sync_client(client, deadline, args.payload_bytes, samples, errors) for _ in range(args.clients))
+        )
+        elapsed = time.perf_counter() - started
+
+    print(f"{args.clients} clients, {elapsed:.1f}s against {base_url}")
+    summarize("PUT", samples["put"], elapsed)
+    summarize("GET", samples["get"], elapsed)
+    total = len(samples["put"]) + len(samples["get"])
+    print(f"total {total / elapsed:8.1f} req/s, {len(errors)} errors")
+    for error in errors[:5]:
+        print(f"  {error}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
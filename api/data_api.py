@@ -1,16 +1,36 @@
 import os
 import configparser
 import asyncio
+import base64
+import gzip
+import hashlib
 import json
+import re
 import sqlite3
-from datetime import datetime, timedelta
-from typing import Optional
+import threading
+import time
+import zlib
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date as date_type, datetime, timedelta
+from typing import List, Optional
 
 import aiomysql
-from fastapi import FastAPI, Query, Depends, Header, HTTPException, Request, status
+from fastapi import FastAPI, Query, Depends, Header, HTTPException, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 import uvicorn
 
+try:
+    import brotli
+except ImportError:  # optional: br bodies are only produced when brotli is installed
+    brotli = None
+
+try:
+    import numpy as np
+except ImportError:  # optional: /similar and /recommend answer 503 without numpy
+    np = None
+
 
 class CaseSensitiveConfigParser(configparser.ConfigParser):
     def optionxform(self, optionstr):
@@ -57,6 +77,306 @@ class Config:
             return int(self.config["server"].get("port", 8000))
         return int(os.getenv("PORT", 8000))
 
+    def max_page_size(self) -> int:
+        return self.config.getint("api", "max_page_size", fallback=500)
+
+    def export_fetch_size(self) -> int:
+        return self.config.getint("api", "export_fetch_size", fallback=500)
+
+    def export_max_streams(self) -> int:
+        return self.config.getint("api", "export_max_streams", fallback=2)
+
+    def embeddings_path(self) -> str:
+        return self.config.get("embeddings", "path", fallback="embeddings")
+
+    def ivf_lists(self) -> int:
+        return self.config.getint("embeddings", "ivf_lists", fallback=0)
+
+    def ivf_nprobe(self) -> int:
+        return self.config.getint("embeddings", "nprobe", fallback=8)
+
+    def ivf_min_rows(self) -> int:
+        return self.config.getint("embeddings", "ivf_min_rows", fallback=100000)
+
+    def sync_db_path(self) -> str:
+        return os.getenv("SYNC_DB_PATH") or self.config.get("sync", "path", fallback="sync.db")
+
+    def sync_workers(self) -> int:
+        return self.config.getint("sync", "workers", fallback=4)
+
+    def sync_expire_interval(self) -> float:
+        return self.config.getfloat("sync", "expire_interval_seconds", fallback=60.0)
+
+    def cache_max_entries(self) -> int:
+        return self.config.getint("cache", "max_entries", fallback=512)
+
+    def cache_max_bytes(self) -> int:
+        return self.config.getint("cache", "max_mb", fallback=256) * 1024 * 1024
+
+    def cache_ttl(self) -> int:
+        return self.config.getint("cache", "ttl_seconds", fallback=300)
+
+    def version_check_seconds(self) -> float:
+        return self.config.getfloat("cache", "version_check_seconds", fallback=2.0)
+
+
+MISSING = object()
+
+
+class ResponseCache:
+    """LRU + TTL cache for endpoint payloads, bounded by entry count and approximate
+    serialized size. Keys embed the data version they were built from, so a new harvest
+    just makes old entries unreachable and they age out through the LRU."""
+
+    def __init__(self, max_entries: int = 512, max_bytes: int = 256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> (expires_at, size, value)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return MISSING
+        expires_at, _, value = entry
+        if expires_at is not None and expires_at < time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return MISSING
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value, ttl: Optional[float] = None, size: Optional[int] = None):
+        if size is None:
+            size = len(json.dumps(value, default=str))
+        if size > self.max_bytes:
+            return
+        if key in self.entries:
+            self._remove(key)
+        expires_at = time.monotonic() + ttl if ttl else None
+        self.entries[key] = (expires_at, size, value)
+        self.bytes += size
+        while len(self.entries) > self.max_entries or self.bytes > self.max_bytes:
+            _, (_, old_size, _) = self.entries.popitem(last=False)
+            self.bytes -= old_size
+
+    def _remove(self, key):
+        _, size, _ = self.entries.pop(key)
+        self.bytes -= size
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+
+class VectorIndex:
+    """Article embeddings written by arxiv_auto, mirrored into a memory-mapped float32
+    matrix (vectors.f32 + ids.npy + meta.json under the embeddings path) so restarts only
+    pull rows newer than the last synced seq. Rows are L2-normalized, so cosine similarity
+    is a dot product; search scans the matrix in blocks, or only the nprobe nearest IVF
+    lists once the corpus is past ivf_min_rows and ivf_lists > 0. Rows overwritten since
+    the lists were built may belong to another list now, so they are always scanned too
+    until the next rebuild. Vectors of deleted articles stay in the matrix; callers
+    over-fetch to make up for them."""
+
+    BLOCK_ROWS = 65536
+
+    def __init__(self, directory: str, ivf_lists: int = 0, nprobe: int = 8, ivf_min_rows: int = 100000):
+        self.directory = directory
+        self.ivf_lists = ivf_lists
+        self.nprobe = nprobe
+        self.ivf_min_rows = ivf_min_rows
+        self.lock = threading.Lock()
+        self.model = None
+        self.dim = 0
+        self.count = 0
+        self.last_seq = 0
+        self.vectors = None
+        self.ids = None
+        self.rows = {}  # article_id -> row in the matrix
+        self.centroids = None
+        self.list_order = None
+        self.list_offsets = None
+        self.indexed_count = 0
+        self.moved = set()  # rows below indexed_count overwritten after build_ivf
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _load(self):
+        try:
+            with open(self._path("meta.json")) as f:
+                meta = json.load(f)
+            ids = np.load(self._path("ids.npy"))
+        except (OSError, ValueError):
+            return
+        try:
+            size = os.path.getsize(self._path("vectors.f32"))
+        except OSError:
+            size = -1
+        if size < len(ids) * meta["dim"] * 4:
+            # meta.json without (all of) its matrix, e.g. vectors.f32 deleted by hand: mapping it
+            # would serve zero vectors, so stay empty and let sync_vectors rebuild from seq 0
+            return
+        self.model, self.dim, self.last_seq = meta["model"], meta["dim"], meta["last_seq"]
+        self.count = len(ids)
+        self._open(max(self.count, 1024))
+        self.ids[: self.count] = ids
+        self.rows = {int(article_id): row for row, article_id in enumerate(ids)}
+
+    def _open(self, capacity: int):
+        """(Re)map vectors.f32 with room for capacity rows, growing the file if needed."""
+        path = self._path("vectors.f32")
+        size = capacity * self.dim * 4
+        with open(path, "ab") as f:
+            if f.tell() < size:
+                f.truncate(size)
+        self.vectors = np.memmap(path, dtype="<f4", mode="r+", shape=(capacity, self.dim))
+        ids = np.zeros(capacity, dtype=np.int64)
+        if self.ids is not None:
+            ids[: self.count] = self.ids[: self.count]
+        self.ids = ids
+
+    def reset(self, model: str, dim: int):
+        """Start over for a different embedding model (its vectors are not comparable)."""
+        with self.lock:
+            self.model, self.dim = model, dim
+            self.count, self.last_seq = 0, 0
+            self.ids, self.rows = None, {}
+            self.centroids = self.list_order = self.list_offsets = None
+            self.indexed_count = 0
+            self.moved = set()
+            if os.path.exists(self._path("vectors.f32")):
+                os.remove(self._path("vectors.f32"))
+            self._open(1024)
+            self._save()
+
+    def add(self, batch):
+        """Append or overwrite rows from (seq, article_id, vector_bytes) tuples."""
+        vectors = np.frombuffer(b"".join(row[2] for row in batch), dtype="<f4").reshape(len(batch), self.dim)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+        with self.lock:
+            needed = self.count + len(batch)
+            if needed > len(self.ids):
+                self._open(max(needed, 2 * len(self.ids)))
+            for (seq, article_id, _), vector in zip(batch, vectors):
+                row = self.rows.get(article_id)
+                if row is None:
+                    row = self.count
+                    self.rows[article_id] = row
+                    self.ids[row] = article_id
+                    self.count += 1
+                elif row < self.indexed_count:
+                    self.moved.add(row)
+                self.vectors[row] = vector
+                self.last_seq = max(self.last_seq, seq)
+
+    def commit(self):
+        """Flush to disk and rebuild the IVF lists when more than 20% of the rows are new
+        or were overwritten since the last build."""
+        with self.lock:
+            self.vectors.flush()
+            self._save()
+            stale = self.count - self.indexed_count + len(self.moved) > self.indexed_count * 0.2
+        if self.ivf_lists and self.count >= self.ivf_min_rows and stale:
+            self.build_ivf()
+
+    def _save(self):
+        np.save(self._path("ids.npy"), self.ids[: self.count])
+        tmp = self._path("meta.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump({"model": self.model, "dim": self.dim, "last_seq": self.last_seq}, f)
+        os.replace(tmp, self._path("meta.json"))
+
+    def build_ivf(self, iterations: int = 10, seed: int = 0):
+        """Spherical k-means on a sample, then bucket every row by its nearest centroid."""
+        count, vectors = self.count, self.vectors
+        rng = np.random.default_rng(seed)
+        lists = min(self.ivf_lists, count)
+        sample = np.asarray(vectors[np.sort(rng.choice(count, min(count, lists * 64), replace=False))])
+        centroids = sample[rng.choice(len(sample), lists, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            for j in range(lists):
+                members = sample[assignment == j]
+                if len(members):
+                    centroid = members.sum(axis=0)
+                    centroids[j] = centroid / (np.linalg.norm(centroid) or 1)
+        assignment = np.empty(count, dtype=np.int32)
+        for start in range(0, count, self.BLOCK_ROWS):
+            block = np.asarray(vectors[start : min(start + self.BLOCK_ROWS, count)])
+            assignment[start : start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        order = np.argsort(assignment, kind="stable")
+        offsets = np.searchsorted(assignment[order], np.arange(lists + 1))
+        with self.lock:
+            self.centroids, self.list_order, self.list_offsets = centroids, order, offsets
+            self.indexed_count = count
+            self.moved = set()
+
+    def vector(self, article_id: int):
+        row = self.rows.get(article_id)
+        return None if row is None else np.array(self.vectors[row])
+
+    def search(self, query, k: int, exclude=()):
+        """Top-k (article_id, cosine) for a query vector, skipping excluded article ids."""
+        with self.lock:
+            count, vectors, ids = self.count, self.vectors, self.ids
+            centroids, order, offsets, indexed = self.centroids, self.list_order, self.list_offsets, self.indexed_count
+            moved = np.fromiter(self.moved, dtype=np.int64, count=len(self.moved))
+        if not count:
+            return []
+        query = np.asarray(query, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1)
+        want = k + len(exclude)
+
+        if centroids is not None:
+            probe = np.argsort(centroids @ query)[::-1][: self.nprobe]
+            rows = np.concatenate([order[offsets[j] : offsets[j + 1]] for j in probe] + [moved, np.arange(indexed, count)])
+            rows = np.unique(rows)  # sorted for sequential reads from the memmap, moved rows once
+            scores = np.asarray(vectors[rows]) @ query
+            best = top_k(scores, want)
+            candidates = [(rows[i], scores[i]) for i in best]
+        else:
+            candidates = []
+            for start in range(0, count, self.BLOCK_ROWS):
+                scores = np.asarray(vectors[start : min(start + self.BLOCK_ROWS, count)]) @ query
+                candidates.extend((start + i, scores[i]) for i in top_k(scores, want))
+            candidates.sort(key=lambda item: item[1], reverse=True)
+
+        excluded = set(exclude)
+        results = []
+        for row, score in candidates:
+            article_id = int(ids[row])
+            if article_id in excluded:
+                continue
+            results.append((article_id, float(score)))
+            if len(results) == k:
+                break
+        return results
+
+
+def top_k(scores, k: int):
+    """Indices of the k largest scores, best first."""
+    if k >= len(scores):
+        return np.argsort(scores)[::-1]
+    best = np.argpartition(scores, -k)[-k:]
+    return best[np.argsort(scores[best])[::-1]]
+
 
 async def create_pool(loop, db_config: dict):
     return await aiomysql.create_pool(loop=loop, **db_config)
@@ -66,10 +386,32 @@ config = Config()
 app = FastAPI(title="Arxiv Day Data API", version="1.0.0")
 app.state.pool = None
 app.state.table = config.articles_table()
+app.state.category_table = f"{config.articles_table()}_categories"
+app.state.counts_table = f"{config.articles_table()}_category_counts"
+app.state.totals_table = f"{config.articles_table()}_category_totals"
+app.state.versions_table = f"{config.articles_table()}_versions"
+app.state.embeddings_table = f"{config.articles_table()}_embeddings"
+app.state.vectors = None
+app.state.vectors_checked_at = 0.0
+app.state.vectors_window = None  # seqs within VECTOR_SEQ_WINDOW below last_seq that syncs have read
+app.state.vectors_lock = asyncio.Lock()
 app.state.api_key = None
+app.state.cache = ResponseCache(config.cache_max_entries(), config.cache_max_bytes())
+app.state.versions = {}
+app.state.versions_checked_at = 0.0
+app.state.versions_lock = asyncio.Lock()
+app.state.export_slots = asyncio.Semaphore(config.export_max_streams())
+SEARCH_FACET_LIMIT = 30
+# Facets count the best SEARCH_FACET_ROWS matches only, so a broad query costs a bounded
+# GROUP BY instead of one over the whole match set
+SEARCH_FACET_ROWS = 5000
+VERSION_SUFFIX_RE = re.compile(r"v\d+$")
+# Queries containing CJK characters go to the ngram index over the Chinese translations
+CJK_RE = re.compile(r"[\u3400-\u9fff\uf900-\ufaff]")
 SYNC_TTL = timedelta(minutes=15)
-SYNC_LOCK = asyncio.Lock()
-SYNC_DB_PATH = os.getenv("SYNC_DB_PATH", "sync.db")
+# seqs are allocated at insert but become visible at commit, so a concurrent writer's row
+# can appear below a seq already synced; every sync re-reads this many seqs below last_seq
+VECTOR_SEQ_WINDOW = 10000
 
 
 async def run_in_thread(fn, *args):
@@ -91,11 +433,22 @@ async def startup_event():
     loop = asyncio.get_running_loop()
     app.state.pool = await create_pool(loop, config.db_config())
     app.state.api_key = config.api_key()
-    await run_in_thread(init_sync_db)
+    app.state.sync = SyncStore(config.sync_db_path(), SYNC_TTL.total_seconds(), config.sync_workers())
+    await app.state.sync.run(app.state.sync.init)
+    app.state.sync_expiry = asyncio.create_task(expire_sync_blobs(config.sync_expire_interval()))
+    if np is not None:
+        app.state.vectors = await run_in_thread(
+            VectorIndex, config.embeddings_path(), config.ivf_lists(), config.ivf_nprobe(), config.ivf_min_rows()
+        )
+        app.state.vectors_sync = asyncio.create_task(sync_vectors())
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    app.state.sync_expiry.cancel()
+    if getattr(app.state, "vectors_sync", None) is not None:
+        app.state.vectors_sync.cancel()
+    app.state.sync.close()
     pool = app.state.pool
     if pool:
         pool.close()
@@ -114,35 +467,109 @@ async def verify_api_key(
         )
 
 
-async def fetch_latest_date(pool, table: str) -> Optional[str]:
-    async with pool.acquire() as conn:
-        async with conn.cursor(aiomysql.DictCursor) as cur:
-            await cur.execute(f"SELECT MAX(DATE(updated)) AS latest_date FROM {table}")
-            row = await cur.fetchone()
-            return row["latest_date"].strftime("%Y-%m-%d") if row and row["latest_date"] else None
+def split_param(values) -> list:
+    """Values of a repeated and/or comma separated query param."""
+    return [cat.strip() for value in values or [] for cat in value.split(",") if cat.strip()]
+
+
+def category_filter(categories) -> tuple:
+    """WHERE clause keeping articles (alias a) in any of categories. EXISTS rather than a
+    join so an article in several of them is returned once."""
+    placeholders = ", ".join(["%s"] * len(categories))
+    sql = (
+        f"EXISTS (SELECT 1 FROM {app.state.category_table} c "
+        f"WHERE c.article_id = a.id AND c.category IN ({placeholders}))"
+    )
+    return sql, list(categories)
+
+
+def normalize_date(date: Optional[str]) -> Optional[str]:
+    """Canonical YYYY-MM-DD form of a date query param (cache keys and versions use it)."""
+    if not date:
+        return None
+    try:
+        return datetime.strptime(date, "%Y-%m-%d").strftime("%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="date must be YYYY-MM-DD")
+
+
+async def current_versions() -> dict:
+    """Data versions bumped by the harvester on every insert: {"global": n, "YYYY-MM-DD": n}.
+    Checked at most every version_check_seconds; the per-day rows are only reloaded
+    when the global version moved."""
+    state = app.state
+    if time.monotonic() - state.versions_checked_at < config.version_check_seconds():
+        return state.versions
+    async with state.versions_lock:
+        if time.monotonic() - state.versions_checked_at < config.version_check_seconds():
+            return state.versions
+        try:
+            async with state.pool.acquire() as conn:
+                async with conn.cursor() as cur:
+                    await cur.execute(f"SELECT version FROM {state.versions_table} WHERE scope='global'")
+                    row = await cur.fetchone()
+                    if row is None:
+                        state.versions = {}
+                    elif row[0] != state.versions.get("global"):
+                        await cur.execute(f"SELECT scope, version FROM {state.versions_table}")
+                        state.versions = {scope: version for scope, version in await cur.fetchall()}
+        except aiomysql.Error:
+            # Versions table not migrated yet: keep serving; with no version to key on,
+            # cached() falls back to the TTL for every scope
+            pass
+        state.versions_checked_at = time.monotonic()
+    return state.versions
+
+
+async def cached(key: tuple, scope: str, builder, ttl: Optional[float] = None):
+    """Return the payload for key at the current data version of scope ("global" or a
+    YYYY-MM-DD day), building and caching it on a miss. A scope without a version row
+    (days written before the versions table existed, or the table is unreadable) cannot
+    be invalidated by a bump, so its entries always expire after cache_ttl."""
+    version = (await current_versions()).get(scope)
+    full_key = key + (scope, version)
+    value = app.state.cache.get(full_key)
+    if value is not MISSING:
+        return value
+    value = await builder()
+    if version is None and ttl is None:
+        ttl = config.cache_ttl()
+    app.state.cache.set(full_key, value, ttl)
+    return value
+
+
+async def cached_latest_date() -> Optional[str]:
+    return await cached(
+        ("latest_date",), "global", lambda: fetch_latest_date(app.state.pool, app.state.table), config.cache_ttl()
+    )
 
 
-async def count_by_category(pool, table: str, category: str, date: str) -> int:
+async def fetch_latest_date(pool, table: str) -> Optional[str]:
     async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
-            await cur.execute(
-                f"SELECT COUNT(*) AS count FROM {table} WHERE DATE(updated)=%s AND categories LIKE %s",
-                (date, f"%{category}%"),
-            )
+            await cur.execute(f"SELECT MAX(updated_date) AS latest_date FROM {table}")
             row = await cur.fetchone()
-            return row["count"] if row else 0
+            return row["latest_date"].strftime("%Y-%m-%d") if row and row["latest_date"] else None
 
 
-async def count_all_by_category(pool, table: str, category: str) -> int:
-    """Count all rows for a given category (no date filter)."""
+async def counts_by_category(pool, table: str, categories, date: Optional[str] = None) -> dict:
+    """Per-category counts for one day from the per-day rollup table, or all time when
+    date is None from the per-category totals table (one row each, so the cost does not
+    grow with history). Both are maintained by the harvester."""
+    if not categories:
+        return {}
+    placeholders = ", ".join(["%s"] * len(categories))
+    if date:
+        sql = f"SELECT category, count FROM {table} WHERE updated_date=%s AND category IN ({placeholders})"
+        params = [date, *categories]
+    else:
+        sql = f"SELECT category, count FROM {table} WHERE category IN ({placeholders})"
+        params = list(categories)
     async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
-            await cur.execute(
-                f"SELECT COUNT(*) AS count FROM {table} WHERE categories LIKE %s",
-                (f"%{category}%",),
-            )
-            row = await cur.fetchone()
-            return row["count"] if row else 0
+            await cur.execute(sql, params)
+            rows = await cur.fetchall()
+    return {row["category"]: int(row["count"]) for row in rows}
 
 
 @app.get("/")
@@ -153,15 +580,24 @@ async def root(auth=Depends(verify_api_key)):
         "endpoints": {
             "health": "/health",
             "latest": "/latest",
-            "articles": "/articles?date=YYYY-MM-DD&category=cs.AI&page=1&page_size=1000",
+            "articles": "/articles?date=YYYY-MM-DD&category=cs.AI&page_size=200&after=<next_cursor>&include_total=false",
             "calendar": "/calendar",
             "categories": "/categories",
             "categories_counts": "/categories/counts?date=YYYY-MM-DD&all_time=false",
+            "search": "/search?q=diffusion&start=YYYY-MM-DD&end=YYYY-MM-DD&category=cs.AI&page=1&page_size=20",
+            "similar": "/similar?entry_id=http://arxiv.org/abs/XXXX.XXXXXvN&k=10",
+            "recommend": "/recommend?entry_id=...&entry_id=...&k=20",
+            "export": "/export?start=YYYY-MM-DD&end=YYYY-MM-DD&category=cs.AI&since=YYYY-MM-DDTHH:MM:SS",
+            "version": "/version",
+            "cache_stats": "/cache/stats",
             "sync_put": "/sync/{id}",
             "sync_get": "/sync/{id}",
         },
         "auth": "Pass X-API-Key header with the configured key.",
-        "note": "All endpoints are read-only. Date defaults to latest when omitted. page_size has no enforced upper limit—use responsibly.",
+        "note": (
+            "All endpoints are read-only. Date defaults to latest when omitted. "
+            f"page_size is capped at {config.max_page_size()}; page through /articles with after=<next_cursor>."
+        ),
     }
 
 
@@ -172,15 +608,19 @@ async def health(auth=Depends(verify_api_key)):
 
 @app.get("/latest")
 async def latest(auth=Depends(verify_api_key)):
+    return await cached(("latest",), "global", load_latest, config.cache_ttl())
+
+
+async def load_latest():
     pool = app.state.pool
     table = app.state.table
-    latest_date = await fetch_latest_date(pool, table)
+    latest_date = await cached_latest_date()
     if not latest_date:
         return {"date": None, "count": 0}
     async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
             await cur.execute(
-                f"SELECT COUNT(*) AS count FROM {table} WHERE DATE(updated)=%s",
+                f"SELECT COUNT(*) AS count FROM {table} WHERE updated_date=%s",
                 (latest_date,),
             )
             row = await cur.fetchone()
@@ -188,74 +628,223 @@ async def latest(auth=Depends(verify_api_key)):
     return {"date": latest_date, "count": count}
 
 
+def json_default(value):
+    if isinstance(value, (datetime, date_type)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+# Encodings encode_bodies produces besides identity
+BODY_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def encode_bodies(payload) -> dict:
+    """Serialize a payload once and precompress it: {"identity": ..., "gzip": ..., "br": ...}."""
+    body = json.dumps(payload, default=json_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    bodies = {"identity": body, "gzip": gzip.compress(body, compresslevel=6)}
+    if brotli is not None:
+        bodies["br"] = brotli.compress(body, quality=5)
+    return bodies
+
+
+def pick_encoding(accept_encoding: Optional[str], available) -> str:
+    """Best of br > gzip > identity that the client accepts (q=0 excludes a coding)."""
+    accepted = set()
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if coding and params.replace(" ", "") not in ("q=0", "q=0.0"):
+            accepted.add(coding.strip().lower())
+    for coding in ("br", "gzip"):
+        if coding in available and (coding in accepted or "*" in accepted):
+            return coding
+    return "identity"
+
+
+def encode_cursor(updated: datetime, article_id: int) -> str:
+    """Opaque keyset cursor for the row after (updated, id) in updated DESC, id DESC order."""
+    raw = json.dumps([updated.isoformat(), article_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str):
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        updated, article_id = json.loads(raw)
+        return datetime.fromisoformat(updated), int(article_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="invalid cursor")
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison (RFC 9110) of each tag in the If-None-Match list against etag.
+    Every encoding has its own tag, so a match means the client holds these exact bytes."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    etag = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def encoded_etag(tag: str, encoding: str) -> str:
+    return f'"{tag}"' if encoding == "identity" else f'"{tag}-{encoding}"'
+
+
 @app.get("/articles")
 async def articles(
+    request: Request,
     date: Optional[str] = None,
-    category: Optional[str] = None,
+    category: Optional[List[str]] = Query(None),
     page: int = Query(1, ge=1),
-    page_size: int = Query(200, ge=1),
+    page_size: int = Query(200, ge=1, le=config.max_page_size()),
+    after: Optional[str] = None,
+    include_total: bool = True,
     auth=Depends(verify_api_key),
+):
+    # after=<next_cursor> switches to keyset pagination (page is ignored); OFFSET is
+    # kept for old clients but gets slower the deeper the page. category may be
+    # repeated or comma separated and keeps articles in any of them.
+    cursor = decode_cursor(after) if after else None
+    categories = tuple(sorted(set(split_param(category))))
+    target_date = normalize_date(date) or await cached_latest_date()
+    if not target_date:
+        return {"date": None, "total": 0, "page": page, "page_size": page_size, "next_cursor": None, "items": []}
+
+    # A day's pages only change when the harvester bumps that day's version, so the
+    # ETag is known before touching MySQL and repeat requests can be answered with 304.
+    version = (await current_versions()).get(target_date)
+    headers = {"Vary": "Accept-Encoding", "Cache-Control": "private, no-cache"}
+    # The encoding only depends on the client and on whether brotli is installed, so the
+    # per-encoding tag is known up front as well
+    encoding = pick_encoding(request.headers.get("accept-encoding"), BODY_ENCODINGS)
+    tag = None
+    if version is not None:
+        query = f"{target_date}|{version}|{','.join(categories)}|{page}|{page_size}|{after}|{include_total}"
+        tag = hashlib.sha1(query.encode("utf-8")).hexdigest()[:24]
+        headers["ETag"] = encoded_etag(tag, encoding)
+        if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    key = ("articles", target_date, categories, page, page_size, after, include_total, version)
+    bodies = app.state.cache.get(key)
+    if bodies is MISSING:
+        bodies = encode_bodies(await load_articles(target_date, categories, page, page_size, cursor, include_total))
+        # Without a version row nothing invalidates the entry, so it expires by TTL
+        ttl = None if version is not None else config.cache_ttl()
+        app.state.cache.set(key, bodies, ttl=ttl, size=sum(len(body) for body in bodies.values()))
+
+    if tag is None:
+        # No version row for this day: tag the content itself, so the tag changes with it
+        tag = hashlib.sha1(bodies["identity"]).hexdigest()[:24]
+        headers["ETag"] = encoded_etag(tag, encoding)
+        if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(content=bodies[encoding], media_type="application/json", headers=headers)
+
+
+async def load_articles(
+    target_date: str,
+    categories: tuple,
+    page: int,
+    page_size: int,
+    cursor: Optional[tuple] = None,
+    include_total: bool = True,
 ):
     pool = app.state.pool
     table = app.state.table
 
-    target_date = date or await fetch_latest_date(pool, table)
-    if not target_date:
-        return {"date": None, "total": 0, "page": page, "page_size": page_size, "items": []}
-
-    where_clauses = ["DATE(updated)=%s"]
-    params = [target_date]
-    if category:
-        where_clauses.append("categories LIKE %s")
-        params.append(f"%{category}%")
-    where_sql = " AND ".join(where_clauses)
-
-    offset = (page - 1) * page_size
+    # Category filtering goes through the join table (exact match, indexed on category + date)
+    if len(categories) == 1:
+        from_sql = f"{table} a JOIN {app.state.category_table} c ON c.article_id = a.id"
+        where_sql = "c.category=%s AND c.updated_date=%s"
+        params = [categories[0], target_date]
+    elif categories:
+        category_sql, category_params = category_filter(categories)
+        from_sql = f"{table} a"
+        where_sql = f"a.updated_date=%s AND {category_sql}"
+        params = [target_date] + category_params
+    else:
+        from_sql = f"{table} a"
+        where_sql = "a.updated_date=%s"
+        params = [target_date]
+
+    # Keyset: continue strictly after the last (updated, id) seen, so MySQL seeks in the
+    # (updated_date, updated) index instead of reading and discarding OFFSET rows.
+    page_sql = f"WHERE {where_sql}"
+    page_params = list(params)
+    if cursor:
+        page_sql += " AND (a.updated < %s OR (a.updated = %s AND a.id < %s))"
+        updated, article_id = cursor
+        page_params += [updated, updated, article_id]
+        offset = 0
+    else:
+        offset = (page - 1) * page_size
 
     async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
-            await cur.execute(
-                f"SELECT COUNT(*) AS count FROM {table} WHERE {where_sql}",
-                params,
-            )
-            total = (await cur.fetchone())["count"]
-
+            total = None
+            if include_total:
+                await cur.execute(
+                    f"SELECT COUNT(*) AS count FROM {from_sql} WHERE {where_sql}",
+                    params,
+                )
+                total = (await cur.fetchone())["count"]
+
+            # One extra row tells whether there is a next page without counting
             await cur.execute(
                 f"""
-                SELECT title, summary, authors, categories, comment, entry_id,
-                       journal_ref, updated, CN_title, CN_summary
-                FROM {table}
-                WHERE {where_sql}
-                ORDER BY updated DESC
+                SELECT a.id, a.title, a.summary, a.authors, a.categories, a.comment, a.entry_id,
+                       a.journal_ref, a.updated, a.CN_title, a.CN_summary
+                FROM {from_sql}
+                {page_sql}
+                ORDER BY a.updated DESC, a.id DESC
                 LIMIT %s OFFSET %s
                 """,
-                params + [page_size, offset],
+                page_params + [page_size + 1, offset],
             )
             rows = await cur.fetchall()
 
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(rows[-1]["updated"], rows[-1]["id"])
+
     return {
         "date": target_date,
         "total": total,
-        "page": page,
+        "page": None if cursor else page,
         "page_size": page_size,
+        "next_cursor": next_cursor,
         "items": rows,
     }
 
 
 @app.get("/calendar")
 async def calendar(auth=Depends(verify_api_key)):
+    return await cached(("calendar",), "global", load_calendar, config.cache_ttl())
+
+
+async def load_calendar():
     pool = app.state.pool
     table = app.state.table
     async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
-            await cur.execute(f"SELECT DISTINCT YEAR(updated) AS year FROM {table} ORDER BY year DESC")
-            years_data = await cur.fetchall()
             await cur.execute(
-                f"SELECT DISTINCT DATE(updated) AS day FROM {table} ORDER BY day DESC"
+                f"SELECT DISTINCT updated_date AS day FROM {table} ORDER BY day DESC"
             )
             days_data = await cur.fetchall()
-    years = [row["year"] for row in years_data if row["year"]]
-    days = [row["day"].strftime("%Y-%m-%d") for row in days_data if row["day"]]
+    days = [row["day"] for row in days_data if row["day"]]
+    years = sorted({day.year for day in days}, reverse=True)
+    days = [day.strftime("%Y-%m-%d") for day in days]
     return {"years": years, "days": days}
 
 
@@ -271,89 +860,552 @@ async def categories_counts(
     auth=Depends(verify_api_key),
 ):
     pool = app.state.pool
-    table = app.state.table
+    counts_table = app.state.counts_table
     categories = config.categories()
-    results = []
     if all_time:
-        for cat in categories:
-            cnt = await count_all_by_category(pool, table, cat)
-            results.append({"category": cat, "count": cnt})
-        return {"date": None, "items": results, "scope": "all_time"}
+        async def load_all_time():
+            counts = await counts_by_category(pool, app.state.totals_table, categories)
+            results = [{"category": cat, "count": counts.get(cat, 0)} for cat in categories]
+            return {"date": None, "items": results, "scope": "all_time"}
 
-    target_date = date or await fetch_latest_date(pool, table)
+        return await cached(("counts", None), "global", load_all_time, config.cache_ttl())
+
+    target_date = normalize_date(date) or await cached_latest_date()
     if not target_date:
         return {"date": None, "items": []}
 
-    for cat in categories:
-        cnt = await count_by_category(pool, table, cat, target_date)
-        results.append({"category": cat, "count": cnt})
-    return {"date": target_date, "items": results, "scope": "daily"}
+    async def load_daily():
+        counts = await counts_by_category(pool, counts_table, categories, target_date)
+        results = [{"category": cat, "count": counts.get(cat, 0)} for cat in categories]
+        return {"date": target_date, "items": results, "scope": "daily"}
 
+    return await cached(("counts", target_date), target_date, load_daily)
 
-def init_sync_db():
-    conn = sqlite3.connect(SYNC_DB_PATH)
-    conn.execute(
-        """
-        CREATE TABLE IF NOT EXISTS sync_blobs (
-            id TEXT PRIMARY KEY,
-            payload TEXT NOT NULL,
-            created_at REAL NOT NULL
-        )
-        """
+
+@app.get("/search")
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    category: Optional[List[str]] = Query(None),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=config.max_page_size()),
+    facets: bool = True,
+    auth=Depends(verify_api_key),
+):
+    """Full-text search over titles and abstracts, ranked by InnoDB's natural-language
+    relevance (a TF-IDF weighting, not BM25).
+
+    English queries use the FULLTEXT index on (title, summary), queries containing Chinese
+    the ngram index on (CN_title, CN_summary); both are created by arxiv_auto. With facets,
+    the response also carries the total and per-day / per-category hit counts, computed
+    over the best SEARCH_FACET_ROWS matches; total_capped tells when there are more.
+    The relevance is evaluated once per request: facets and pages within the best matches
+    are served from that one ranked id list. bench_search.py measures the latency.
+    """
+    query = q.strip()
+    if not query:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="q must not be blank")
+    start_date = normalize_date(start)
+    end_date = normalize_date(end)
+    categories = split_param(category)
+    key = ("search", query, start_date, end_date, tuple(categories), page, page_size, facets)
+    return await cached(
+        key,
+        "global",
+        lambda: load_search(query, start_date, end_date, categories, page, page_size, facets),
+        config.cache_ttl(),
     )
-    conn.commit()
-    conn.close()
 
 
-def sync_put_db(sync_id: str, payload: dict):
-    now_ts = datetime.utcnow().timestamp()
-    conn = sqlite3.connect(SYNC_DB_PATH)
-    conn.execute(
-        "DELETE FROM sync_blobs WHERE created_at < ?",
-        (now_ts - SYNC_TTL.total_seconds(),),
-    )
-    conn.execute(
-        "INSERT OR REPLACE INTO sync_blobs (id, payload, created_at) VALUES (?, ?, ?)",
-        (sync_id, json.dumps(payload), now_ts),
-    )
-    conn.commit()
-    conn.close()
+async def load_search(query, start_date, end_date, categories, page, page_size, facets):
+    pool = app.state.pool
+    table = app.state.table
+    if CJK_RE.search(query):
+        match_sql = "MATCH(a.CN_title, a.CN_summary) AGAINST(%s IN NATURAL LANGUAGE MODE)"
+    else:
+        match_sql = "MATCH(a.title, a.summary) AGAINST(%s IN NATURAL LANGUAGE MODE)"
+    where, params = [match_sql], [query]
+    if start_date:
+        where.append("a.updated_date >= %s")
+        params.append(start_date)
+    if end_date:
+        where.append("a.updated_date <= %s")
+        params.append(end_date)
+    if categories:
+        category_sql, category_params = category_filter(categories)
+        where.append(category_sql)
+        params.extend(category_params)
+    where_sql = " AND ".join(where)
+    offset = (page - 1) * page_size
 
+    total, total_capped, days, category_counts = None, False, [], []
+    try:
+        async with pool.acquire() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cur:
+                matches = None
+                if facets:
+                    # The only FULLTEXT evaluation: the best matches with their scores, which
+                    # serve the facets and (unless the page lies past them) the page itself
+                    await cur.execute(
+                        f"""
+                        SELECT a.id, a.updated_date, {match_sql} AS score
+                        FROM {table} a
+                        WHERE {where_sql}
+                        ORDER BY score DESC, a.id DESC
+                        LIMIT %s
+                        """,
+                        [query] + params + [SEARCH_FACET_ROWS],
+                    )
+                    matches = await cur.fetchall()
+                    total = len(matches)
+                    total_capped = total >= SEARCH_FACET_ROWS
+                    day_counts = Counter(match["updated_date"] for match in matches if match["updated_date"])
+                    days = [
+                        {"date": day.strftime("%Y-%m-%d"), "count": count}
+                        for day, count in sorted(day_counts.items(), reverse=True)[:SEARCH_FACET_LIMIT]
+                    ]
+                    if matches:
+                        ids = [match["id"] for match in matches]
+                        await cur.execute(
+                            f"""
+                            SELECT category, COUNT(*) AS count
+                            FROM {app.state.category_table}
+                            WHERE article_id IN ({", ".join(["%s"] * len(ids))})
+                            GROUP BY category
+                            ORDER BY count DESC
+                            LIMIT %s
+                            """,
+                            ids + [SEARCH_FACET_LIMIT],
+                        )
+                        category_counts = [
+                            {"category": row["category"], "count": row["count"]} for row in await cur.fetchall()
+                        ]
+
+                if matches is not None and (offset + page_size <= total or not total_capped):
+                    page_matches = matches[offset:offset + page_size]
+                    rows = []
+                    if page_matches:
+                        await cur.execute(
+                            f"""
+                            SELECT id, title, summary, authors, categories, comment, entry_id,
+                                   journal_ref, updated, CN_title, CN_summary
+                            FROM {table}
+                            WHERE id IN ({", ".join(["%s"] * len(page_matches))})
+                            """,
+                            [match["id"] for match in page_matches],
+                        )
+                        by_id = {row["id"]: row for row in await cur.fetchall()}
+                        for match in page_matches:
+                            row = by_id.get(match["id"])
+                            if row is not None:
+                                row["score"] = match["score"]
+                                rows.append(row)
+                else:
+                    await cur.execute(
+                        f"""
+                        SELECT a.id, a.title, a.summary, a.authors, a.categories, a.comment, a.entry_id,
+                               a.journal_ref, a.updated, a.CN_title, a.CN_summary, {match_sql} AS score
+                        FROM {table} a
+                        WHERE {where_sql}
+                        ORDER BY score DESC, a.id DESC
+                        LIMIT %s OFFSET %s
+                        """,
+                        [query] + params + [page_size, offset],
+                    )
+                    rows = await cur.fetchall()
+    except aiomysql.Error as exc:
+        # Most likely the FULLTEXT indexes have not been created yet (arxiv_auto adds them on start)
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=f"Search unavailable: {exc}")
+
+    for row in rows:
+        row["score"] = round(float(row["score"]), 4)
+    return {
+        "q": query,
+        "total": total,
+        "total_capped": total_capped,
+        "page": page,
+        "page_size": page_size,
+        "items": rows,
+        "facets": {"dates": days, "categories": category_counts} if facets else None,
+    }
 
-def sync_get_db(sync_id: str):
-    now_ts = datetime.utcnow().timestamp()
-    conn = sqlite3.connect(SYNC_DB_PATH)
-    conn.execute(
-        "DELETE FROM sync_blobs WHERE created_at < ?",
-        (now_ts - SYNC_TTL.total_seconds(),),
-    )
-    cur = conn.execute(
-        "SELECT payload, created_at FROM sync_blobs WHERE id = ?", (sync_id,)
-    )
-    row = cur.fetchone()
-    conn.close()
-    if not row:
-        return None
-    payload, created_at = row
-    if now_ts - created_at > SYNC_TTL.total_seconds():
-        # expired, treat as missing
-        return None
-    data = json.loads(payload)
-    data.setdefault("created_at", datetime.utcfromtimestamp(created_at).isoformat())
-    return data
+
+async def sync_vectors(batch_size: int = 5000):
+    """Pull embeddings newer than the index's last seq into the memory-mapped matrix.
+    Gated on the embeddings table's own MAX(seq), checked at most every
+    version_check_seconds: the harvester commits vectors after bumping the data version,
+    and embedding backfills do not bump it at all. The seqs synced within the
+    VECTOR_SEQ_WINDOW below last_seq are remembered; when the table holds more rows in
+    that window than were synced, a writer committed a lower seq after a later one was
+    read, and the window is scanned again (re-adding a row just overwrites it).
+    Otherwise only rows above last_seq are read. A model change on the harvester side
+    rebuilds the index from scratch."""
+    index = app.state.vectors
+    if index is None or time.monotonic() - app.state.vectors_checked_at < config.version_check_seconds():
+        return
+    async with app.state.vectors_lock:
+        if time.monotonic() - app.state.vectors_checked_at < config.version_check_seconds():
+            return
+        table = app.state.embeddings_table
+        try:
+            async with app.state.pool.acquire() as conn:
+                async with conn.cursor() as cur:
+                    await cur.execute(f"SELECT seq, model, dim FROM {table} ORDER BY seq DESC LIMIT 1")
+                    latest = await cur.fetchone()
+                    if latest is None:
+                        app.state.vectors_checked_at = time.monotonic()
+                        return
+                    _, model, dim = latest
+                    if (model, dim) != (index.model, index.dim):
+                        await run_in_thread(index.reset, model, dim)
+                        app.state.vectors_window = None
+                    floor = max(0, index.last_seq - VECTOR_SEQ_WINDOW)
+                    await cur.execute(
+                        f"SELECT COUNT(*) FROM {table} WHERE seq > %s AND seq <= %s AND model = %s",
+                        (floor, index.last_seq, model),
+                    )
+                    (in_window,) = await cur.fetchone()
+                    app.state.vectors_checked_at = time.monotonic()
+                    seen = app.state.vectors_window
+                    complete = seen is not None and in_window == sum(1 for seq in seen if seq > floor)
+                    if latest[0] <= index.last_seq and complete:
+                        return
+                    after = index.last_seq if complete else floor
+                    recent = [seq for seq in seen if seq <= after] if complete else []
+                    while True:
+                        await cur.execute(
+                            f"SELECT seq, article_id, vector FROM {table} WHERE seq > %s AND model = %s ORDER BY seq LIMIT %s",
+                            (after, model, batch_size),
+                        )
+                        batch = await cur.fetchall()
+                        if not batch:
+                            break
+                        await run_in_thread(index.add, batch)
+                        after = batch[-1][0]
+                        recent = [seq for seq in recent if seq > after - VECTOR_SEQ_WINDOW]
+                        recent.extend(row[0] for row in batch if row[0] > after - VECTOR_SEQ_WINDOW)
+            await run_in_thread(index.commit)
+            # seqs taken from what the scans actually read: a row that commits behind the scan
+            # makes the next COUNT larger and triggers a window rescan
+            floor = max(0, index.last_seq - VECTOR_SEQ_WINDOW)
+            app.state.vectors_window = [seq for seq in recent if seq > floor]
+        except aiomysql.Error as exc:
+            print(f"Embedding sync failed: {exc}")
+
+
+async def article_ids_for(entry_ids) -> dict:
+    """{entry_id: article id}, matched on the versionless paper_id so favorites saved
+    for an older arXiv version still resolve after the harvester stored a newer one."""
+    paper_ids = {VERSION_SUFFIX_RE.sub("", entry_id): entry_id for entry_id in entry_ids}
+    placeholders = ", ".join(["%s"] * len(paper_ids))
+    async with app.state.pool.acquire() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(f"SELECT paper_id, id FROM {app.state.table} WHERE paper_id IN ({placeholders})", list(paper_ids))
+            return {paper_ids[paper_id]: article_id for paper_id, article_id in await cur.fetchall()}
+
+
+async def articles_with_scores(hits) -> list:
+    """Article rows for (article_id, score) hits, in hit order."""
+    if not hits:
+        return []
+    placeholders = ", ".join(["%s"] * len(hits))
+    async with app.state.pool.acquire() as conn:
+        async with conn.cursor(aiomysql.DictCursor) as cur:
+            await cur.execute(
+                f"""
+                SELECT id, title, summary, authors, categories, comment, entry_id,
+                       journal_ref, updated, CN_title, CN_summary
+                FROM {app.state.table}
+                WHERE id IN ({placeholders})
+                """,
+                [article_id for article_id, _ in hits],
+            )
+            by_id = {row["id"]: row for row in await cur.fetchall()}
+    return [{**by_id[article_id], "score": round(score, 4)} for article_id, score in hits if article_id in by_id]
+
+
+async def nearest_articles(index: VectorIndex, vector, k: int, exclude=()) -> list:
+    """Article rows for the k nearest vectors. The index still holds vectors of deleted
+    articles, so it is asked for more hits until k of them resolve or it runs out."""
+    want = k
+    while True:
+        hits = await run_in_thread(index.search, vector, want, exclude)
+        items = await articles_with_scores(hits)
+        if len(items) >= k or len(hits) < want:
+            return items[:k]
+        want *= 2
+
+
+async def vector_index() -> VectorIndex:
+    if np is None or app.state.vectors is None:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="numpy is not installed")
+    await sync_vectors()
+    return app.state.vectors
+
+
+@app.get("/similar")
+async def similar(
+    entry_id: str,
+    k: int = Query(10, ge=1, le=100),
+    auth=Depends(verify_api_key),
+):
+    """Articles closest to one article by embedding cosine similarity. Cache keys carry
+    the index's last seq, so newly synced vectors show up without a data version bump."""
+    index = await vector_index()
+
+    async def load():
+        article_id = (await article_ids_for([entry_id])).get(entry_id)
+        vector = index.vector(article_id) if article_id is not None else None
+        if vector is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No embedding for this entry_id")
+        return {"entry_id": entry_id, "items": await nearest_articles(index, vector, k, (article_id,))}
+
+    return await cached(("similar", entry_id, k, index.last_seq), "global", load, config.cache_ttl())
+
+
+@app.get("/recommend")
+async def recommend(
+    entry_id: List[str] = Query(..., description="favorite entry_ids, repeated or comma separated"),
+    k: int = Query(20, ge=1, le=100),
+    auth=Depends(verify_api_key),
+):
+    """Articles closest to the mean of the favorites' embeddings, favorites excluded."""
+    favorites = sorted(set(split_param(entry_id)))[:500]
+    if not favorites:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="entry_id is required")
+    index = await vector_index()
+
+    async def load():
+        article_ids = list((await article_ids_for(favorites)).values())
+        vectors = [vector for vector in (index.vector(article_id) for article_id in article_ids) if vector is not None]
+        if not vectors:
+            return {"items": []}
+        profile = np.mean(vectors, axis=0)
+        return {"items": await nearest_articles(index, profile, k, tuple(article_ids))}
+
+    return await cached(("recommend", tuple(favorites), k, index.last_seq), "global", load, config.cache_ttl())
+
+
+@app.get("/export")
+async def export(
+    request: Request,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    category: Optional[List[str]] = Query(None),
+    since: Optional[str] = None,
+    auth=Depends(verify_api_key),
+):
+    """Stream every matching article as NDJSON (one JSON object per line), oldest first.
+
+    start/end bound updated_date (inclusive); category may be repeated or comma
+    separated; since keeps rows with updated >= since, so an incremental pull can pass
+    the last timestamp it saw and drop the few repeated rows by entry_id. Sent gzip
+    encoded when the client accepts it.
+    """
+    start_date = normalize_date(start)
+    end_date = normalize_date(end)
+    since_ts = None
+    if since:
+        try:
+            since_ts = datetime.fromisoformat(since.rstrip("Z"))
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="since must be an ISO timestamp")
+    categories = split_param(category)
+
+    table = app.state.table
+    where, params = [], []
+    if start_date:
+        where.append("a.updated_date >= %s")
+        params.append(start_date)
+    if end_date:
+        where.append("a.updated_date <= %s")
+        params.append(end_date)
+    if since_ts:
+        # The DATE() bound is redundant but lets MySQL range-scan (updated_date, updated)
+        # instead of reading every row from the start of the index
+        where.append("a.updated_date >= DATE(%s) AND a.updated >= %s")
+        params.extend([since_ts, since_ts])
+    if categories:
+        category_sql, category_params = category_filter(categories)
+        where.append(category_sql)
+        params.extend(category_params)
+    where_sql = f"WHERE {' AND '.join(where)}" if where else ""
+    # Same order as updated, id (updated_date is DATE(updated)), but spelled as the
+    # (updated_date, updated) index plus the implicit id, so rows stream straight off
+    # the index instead of after a filesort of the whole range
+    sql = f"""
+        SELECT a.id, a.title, a.summary, a.authors, a.categories, a.comment, a.entry_id,
+               a.journal_ref, a.updated, a.CN_title, a.CN_summary
+        FROM {table} a
+        {where_sql}
+        ORDER BY a.updated_date, a.updated, a.id
+    """
+
+    compress = pick_encoding(request.headers.get("accept-encoding"), ("gzip",)) == "gzip"
+    headers = {"Cache-Control": "no-store", "Vary": "Accept-Encoding"}
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(stream_export(sql, params, compress), media_type="application/x-ndjson", headers=headers)
+
+
+async def stream_export(sql: str, params: list, compress: bool):
+    """Read the result through a server-side cursor, fetch_size rows at a time, so memory
+    stays flat however large the dump. The next batch is only fetched after the previous
+    chunk was handed to the client, so a slow reader throttles the query instead of
+    making the API buffer rows.
+
+    A stream can stay open as long as the client keeps reading, so it runs on its own
+    connection rather than one from the shared pool, and at most export_max_streams run
+    at once (later exports wait for a slot)."""
+    fetch_size = config.export_fetch_size()
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None  # wbits=31: gzip framing
+    db_config = {key: value for key, value in config.db_config().items() if key != "pool_recycle"}
+    async with app.state.export_slots:
+        conn = await aiomysql.connect(**db_config)
+        cur = await conn.cursor(aiomysql.SSDictCursor)
+        finished = False
+        try:
+            await cur.execute(sql, params)
+            while True:
+                rows = await cur.fetchmany(fetch_size)
+                if not rows:
+                    break
+                chunk = "".join(
+                    json.dumps(row, default=json_default, ensure_ascii=False) + "\n" for row in rows
+                ).encode("utf-8")
+                if compressor:
+                    chunk = compressor.compress(chunk)
+                if chunk:
+                    yield chunk
+            finished = True
+        finally:
+            if finished:
+                await cur.close()
+                await conn.ensure_closed()
+            else:
+                # Client went away mid-stream: closing the cursor would read the rest of the
+                # result set, so drop the connection without the polite QUIT
+                conn.close()
+    if compressor:
+        yield compressor.flush()
+
+
+@app.get("/version")
+async def version(auth=Depends(verify_api_key)):
+    """Data versions bumped by the harvester: a global counter plus one per day, so
+    clients caching rendered pages know exactly which days changed."""
+    versions = await current_versions()
+    return {
+        "global": versions.get("global"),
+        "latest_date": await cached_latest_date(),
+        "days": {scope: value for scope, value in versions.items() if scope != "global"},
+    }
+
+
+@app.get("/cache/stats")
+async def cache_stats(auth=Depends(verify_api_key)):
+    return {
+        **app.state.cache.stats(),
+        "data_version": app.state.versions.get("global"),
+    }
+
+
+class SyncStore:
+    """Encrypted sync blobs in SQLite, with a persistent WAL-mode connection per worker
+    thread of a dedicated executor. WAL lets reads proceed while one writer commits, so
+    concurrent syncs no longer queue behind per-call connects and the default executor.
+    Expired rows are swept by a background task (expire), not on every request."""
+
+    def __init__(self, path: str, ttl_seconds: float, workers: int = 4):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="sync")
+        self.local = threading.local()
+        self.connections = []
+        self.connections_lock = threading.Lock()
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            # autocommit; each statement is its own short transaction
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+            with self.connections_lock:
+                self.connections.append(conn)
+        return conn
+
+    async def run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, fn, *args)
+
+    def init(self):
+        conn = self.connection()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS sync_blobs (
+                id TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_sync_blobs_created_at ON sync_blobs (created_at)")
+
+    def put(self, sync_id: str, payload: str):
+        self.connection().execute(
+            "INSERT OR REPLACE INTO sync_blobs (id, payload, created_at) VALUES (?, ?, ?)",
+            (sync_id, payload, datetime.utcnow().timestamp()),
+        )
+
+    def get(self, sync_id: str):
+        # Rows past the TTL may not be swept yet; treat them as missing
+        cutoff = datetime.utcnow().timestamp() - self.ttl_seconds
+        row = self.connection().execute(
+            "SELECT payload, created_at FROM sync_blobs WHERE id = ? AND created_at >= ?", (sync_id, cutoff)
+        ).fetchone()
+        if not row:
+            return None
+        payload, created_at = row
+        data = json.loads(payload)
+        data.setdefault("created_at", datetime.utcfromtimestamp(created_at).isoformat())
+        return data
+
+    def expire(self) -> int:
+        cutoff = datetime.utcnow().timestamp() - self.ttl_seconds
+        return self.connection().execute("DELETE FROM sync_blobs WHERE created_at < ?", (cutoff,)).rowcount
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        with self.connections_lock:
+            for conn in self.connections:
+                conn.close()
+            self.connections.clear()
+
+
+async def expire_sync_blobs(interval: float):
+    """Periodically delete expired sync blobs (range scan on the created_at index)."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await app.state.sync.run(app.state.sync.expire)
+        except Exception as exc:
+            print(f"Sync expiry failed: {exc}")
 
 
 @app.put("/sync/{sync_id}")
 async def sync_put(sync_id: str, payload: dict):
     # Basic size guard: reject >2MB payload
-    size_est = len(json.dumps(payload))
-    if size_est > 2_000_000:
+    encoded = json.dumps(payload)
+    if len(encoded) > 2_000_000:
         raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Payload too large")
     required_fields = {"ciphertext", "salt", "iv"}
     if not required_fields.issubset(payload.keys()):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Missing ciphertext/salt/iv")
     try:
-        await run_in_thread(sync_put_db, sync_id, payload)
+        await app.state.sync.run(app.state.sync.put, sync_id, encoded)
     except Exception as exc:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(exc))
     return {"status": "ok", "expires_in_seconds": int(SYNC_TTL.total_seconds())}
@@ -362,7 +1414,7 @@ async def sync_put(sync_id: str, payload: dict):
 @app.get("/sync/{sync_id}")
 async def sync_get(sync_id: str):
     try:
-        result = await run_in_thread(sync_get_db, sync_id)
+        result = await app.state.sync.run(app.state.sync.get, sync_id)
     except Exception as exc:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(exc))
     if result is None:
@@ -1,12 +1,38 @@
+from array import array
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime, timedelta
-from openai import OpenAI
+from email.utils import parsedate_to_datetime
+from itertools import islice
+from openai import OpenAI, APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
 import arxiv
+import argparse
 import configparser
-import mysql.connector
-from mysql.connector import Error
+import hashlib
+import httpx
+import json
+import math
+from mysql.connector import Error, pooling
+import random
+import re
 import schedule
+import sqlite3
+import sys
+import threading
 import time
 
+TITLE_PROMPT = '请帮我翻译这个文献标题：%s'
+SUMMARY_PROMPT = '请帮我翻译这个文献摘要：%s'
+BATCH_TRANSLATE_INSTRUCTION = (
+    "你是学术文献翻译助手。用户会给出一个JSON数组，每个元素包含id、title（文献标题）和summary（文献摘要）。"
+    "请把每个元素的title和summary翻译成中文，只返回一个JSON对象，格式为"
+    '{"translations": [{"id": "<原样保留的id>", "CN_title": "<中文标题>", "CN_summary": "<中文摘要>"}]}，'
+    "不要遗漏任何元素，也不要输出JSON以外的内容。"
+)
+
+# entry_id末尾的版本号（http://arxiv.org/abs/2401.01234v2 中的v2），去掉后即为论文在各版本间不变的paper_id
+VERSION_SUFFIX_RE = re.compile(r"v\d+$")
+
 class Article:
     """
     表示从arXiv获取的文章的类，包含文章的各种元数据以及翻译方法。
@@ -28,75 +54,453 @@ class Article:
         self.summary = summary or ""
         self.title = title or ""
         self.updated = updated or ""
+        self.CN_title = CN_title or ""
+        self.CN_summary = CN_summary or ""
+
+    @property
+    def paper_id(self):
+        return VERSION_SUFFIX_RE.sub("", self.entry_id)
+
+    def to_dict(self):
+        """
+        序列化为可以写入JSON的字典（时间转为ISO格式字符串），用于任务账本。
+        """
+        data = dict(vars(self))
+        for key in ("published", "updated"):
+            if isinstance(data[key], datetime):
+                data[key] = data[key].isoformat()
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        从to_dict()的结果恢复文章。
+        """
+        article = cls()
+        for key, value in data.items():
+            setattr(article, key, value)
+        for key in ("published", "updated"):
+            if isinstance(article.__dict__[key], str) and article.__dict__[key]:
+                setattr(article, key, datetime.fromisoformat(article.__dict__[key]))
+        return article
 
     def gpt_CN_translate(self, model):
         print("Running ChatGPT...")
-        
-        max_retries = 3  # 设置最大重试次数
-        retries = 0
 
-        # 翻译标题
-        while retries < max_retries:
-            try:
-                self.CN_title = model.prompt('请帮我翻译这个文献标题：%s' % (self.title))
-                if self.CN_title is None:
-                    raise Exception("CN_Title 未正确翻译。")
-                break
-            except Exception as e:
-                retries += 1
-                print(f"An error occurred: {e}, Retrying... ({retries}/{max_retries})")
-
-        # 检查是否超出重试次数
-        if retries == max_retries:
+        self.CN_title = model.prompt(TITLE_PROMPT % (self.title))
+        if self.CN_title is None:
             print(f"Failed to translate the TITLE of \"{self.title}\" after maximum retries.")
             return False
 
-        # 重置重试次数
-        retries = 0
-
-        while retries < max_retries:
-            try:
-                self.CN_summary = model.prompt('请帮我翻译这个文献摘要：%s' % (self.summary))
-                if self.CN_summary is None:
-                    raise Exception("CN_summary 未正确翻译。")
-                break
-            except Exception as e:
-                retries += 1
-                print(f"An error occurred: {e}, Retrying... ({retries}/{max_retries})")
-
-        # 检查是否超出重试次数
-        if retries == max_retries:
+        self.CN_summary = model.prompt(SUMMARY_PROMPT % (self.summary))
+        if self.CN_summary is None:
             print(f"Failed to translate the SUMMARY of \"{self.title}\" after maximum retries.")
             return False
-            
+
         print("Job done.")
         return True
 
+# 可以重试的OpenAI错误：限流、连接失败、超时、服务端错误
+RETRYABLE_ERRORS = (RateLimitError, APIConnectionError, APITimeoutError, InternalServerError)
+
+class BatchTranslationInterrupted(Exception):
+    """
+    批量翻译因限流、超时等错误（已在request中重试到上限）中断。translations为中断前已经得到的译文，其余文章按失败处理。
+    """
+    def __init__(self, translations, cause):
+        super().__init__(str(cause))
+        self.translations = translations
+        self.cause = cause
+
+class RateLimiter:
+    """
+    令牌桶限流器，同时限制每分钟请求数（RPM）和每分钟token数（TPM），可在多个翻译线程间共享。值为0表示不限制。
+    """
+    def __init__(self, requests_per_minute=0, tokens_per_minute=0):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.request_bucket = float(requests_per_minute)
+        self.token_bucket = float(tokens_per_minute)
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self.last_refill
+        self.last_refill = now
+        if self.requests_per_minute:
+            self.request_bucket = min(self.requests_per_minute, self.request_bucket + elapsed * self.requests_per_minute / 60)
+        if self.tokens_per_minute:
+            self.token_bucket = min(self.tokens_per_minute, self.token_bucket + elapsed * self.tokens_per_minute / 60)
+
+    def acquire(self, tokens=0):
+        """
+        阻塞直到桶内有1个请求额度和tokens个token额度。单个请求超过整桶容量时按整桶计算，避免永远等待。
+        """
+        tokens = min(tokens, self.tokens_per_minute)
+        while True:
+            with self.lock:
+                self._refill()
+                wait = 0
+                if self.requests_per_minute and self.request_bucket < 1:
+                    wait = (1 - self.request_bucket) * 60 / self.requests_per_minute
+                if self.tokens_per_minute and self.token_bucket < tokens:
+                    wait = max(wait, (tokens - self.token_bucket) * 60 / self.tokens_per_minute)
+                if wait <= 0:
+                    if self.requests_per_minute:
+                        self.request_bucket -= 1
+                    if self.tokens_per_minute:
+                        self.token_bucket -= tokens
+                    return
+            time.sleep(wait)
+
+    def adjust(self, tokens):
+        """
+        请求完成后用实际用量修正token桶，tokens为实际用量与预估值之差（可为负）。
+        """
+        if not self.tokens_per_minute:
+            return
+        with self.lock:
+            self._refill()
+            self.token_bucket = min(self.tokens_per_minute, self.token_bucket - tokens)
+
+def estimate_tokens(text):
+    """
+    粗略估计一段文本的token数（约3个字符一个token），用于限流预扣。
+    """
+    return len(text) // 3 + 1
+
+def retry_after_seconds(error):
+    """
+    从OpenAI错误响应头中读取retry-after-ms / retry-after（秒数或HTTP日期），没有则返回None。
+    """
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        retry_after = headers.get("retry-after")
+        if not retry_after:
+            return None
+        try:
+            return float(retry_after)
+        except ValueError:
+            retry_at = parsedate_to_datetime(retry_after)
+            return max(0.0, (retry_at - datetime.now(retry_at.tzinfo)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+class TranslationCache:
+    """
+    本地SQLite翻译缓存，以“模型 + 提示词 + 原文”的哈希为键，避免同一段文本（新版本重新发布、多个分类交叉收录）被重复翻译。
+    过期策略：超过ttl_days未写入的条目删除，条目数超过max_entries时按最近使用时间淘汰（LRU）。
+    """
+    def __init__(self, path='translation_cache.db', max_entries=100000, ttl_days=90):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_days * 86400
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS translations (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_translations_last_used ON translations (last_used)")
+        self.conn.commit()
+
+    @staticmethod
+    def key(model, message):
+        return hashlib.sha256(f"{model}\0{message}".encode("utf-8")).hexdigest()
+
+    def get(self, model, message):
+        key = self.key(model, message)
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT value FROM translations WHERE key = ? AND created_at >= ?", (key, now - self.ttl_seconds)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.conn.execute("UPDATE translations SET last_used = ? WHERE key = ?", (now, key))
+            self.conn.commit()
+            return row[0]
+
+    def put(self, model, message, value):
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO translations (key, model, value, created_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                (self.key(model, message), model, value, now, now),
+            )
+            self.conn.commit()
+
+    def prune(self):
+        """
+        删除过期条目，并按LRU把条目数压到max_entries以内。
+        """
+        with self.lock:
+            self.conn.execute("DELETE FROM translations WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+            self.conn.execute(
+                """
+                DELETE FROM translations WHERE key IN (
+                    SELECT key FROM translations ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+            self.conn.commit()
+
+    def reset_stats(self):
+        """
+        清零命中统计。缓存对象在多次定时运行之间复用，每次运行开始时调用，report只反映本次运行。
+        """
+        with self.lock:
+            self.hits = 0
+            self.misses = 0
+
+    def report(self):
+        total = self.hits + self.misses
+        ratio = self.hits / total if total else 0
+        return f"翻译缓存：命中{self.hits}次，未命中{self.misses}次，命中率{ratio:.1%}。"
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
 class ChatGPTModel:
     """
     封装与ChatGPT模型交互的方法，主要用于将英文标题和摘要翻译成中文。
+    请求经过共享的RateLimiter限流，遇到限流/超时/服务端错误时按指数退避重试，并优先遵循服务端返回的retry-after。
     """
     # GPT API pricing: https://openai.com/pricing
-    def __init__(self, api_key=None, model="gpt-3.5-turbo-0125"):
-        self.client = OpenAI(api_key=api_key)
+    def __init__(self, api_key=None, model="gpt-3.5-turbo-0125", base_url=None, rate_limiter=None, max_retries=5, cache=None, http_client=None):
+        # 重试由本类负责，关闭SDK自带的重试；base_url可指向任意OpenAI兼容的服务（例如本地测试用的假服务）
+        self.client = OpenAI(api_key=api_key, base_url=base_url, max_retries=0, http_client=http_client)
         self.model = model
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.max_retries = max_retries
+        self.cache = cache
 
     def prompt(self, message, temperature=0.7, max_tokens=2000):
+        if self.cache is not None:
+            cached = self.cache.get(self.model, message)
+            if cached is not None:
+                return cached
         try:
-            chat_completion = self.client.chat.completions.create(
-                messages=[
-                    {
-                        "role": "user",
-                        "content": message,
-                    }
+            content = self.chat([{"role": "user", "content": message}], temperature, max_tokens)
+        except Exception as e:
+            print(f"An error occurred: {e}")
+            return None
+        if self.cache is not None and content:
+            self.cache.put(self.model, message, content)
+        return content
+
+    def translate_batch(self, items, max_tokens=4000):
+        """
+        批量翻译：把多篇文章的标题和摘要（[{"id", "title", "summary"}, ...]）打包成一个JSON请求，按id解析回复，
+        返回{id: (CN_title, CN_summary)}。回复格式错误或缺少部分id时只重试失败的部分，整批失败则对半拆分后重试；
+        拆到单篇仍失败的文章不会出现在结果中。
+        限流、超时等错误在request中重试到上限后不再拆分，抛出BatchTranslationInterrupted，其中带有已经得到的译文（包括缓存命中）。
+        标题和摘要分别按逐篇翻译时的提示词查询/写入缓存，因此两种翻译模式共享缓存；每一部分译文返回后立即写入缓存。
+        """
+        translations = {}
+        pending = []
+        for item in items:
+            if self.cache is not None:
+                CN_title = self.cache.get(self.model, TITLE_PROMPT % item["title"])
+                CN_summary = self.cache.get(self.model, SUMMARY_PROMPT % item["summary"])
+                if CN_title is not None and CN_summary is not None:
+                    translations[item["id"]] = (CN_title, CN_summary)
+                    continue
+            pending.append(item)
+
+        try:
+            self._translate_batch(pending, max_tokens, translations)
+        except RETRYABLE_ERRORS as e:
+            raise BatchTranslationInterrupted(translations, e) from e
+        return translations
+
+    def _translate_batch(self, items, max_tokens, translations):
+        """
+        翻译items并把结果写入translations（原地更新，出错抛出时已完成的部分不会丢失）。
+        """
+        if not items:
+            return
+        try:
+            content = self.chat(
+                [
+                    {"role": "system", "content": BATCH_TRANSLATE_INSTRUCTION},
+                    {"role": "user", "content": json.dumps(items, ensure_ascii=False)},
                 ],
-                model=self.model,
-                temperature=temperature,
-                max_tokens=max_tokens
+                temperature=0.3, max_tokens=max_tokens, response_format={"type": "json_object"}
             )
-            return chat_completion.choices[0].message.content
+            fresh = parse_batch_translations(content, {item["id"] for item in items})
+        except RETRYABLE_ERRORS:
+            # request已经按退避重试到上限，拆分或逐篇翻译只会把同一个错误再重试很多遍；剩下的文章交给上层按失败处理
+            raise
         except Exception as e:
             print(f"An error occurred: {e}")
+            fresh = {}
+
+        for item in items:
+            if item["id"] in fresh:
+                CN_title, CN_summary = fresh[item["id"]]
+                translations[item["id"]] = (CN_title, CN_summary)
+                if self.cache is not None:
+                    self.cache.put(self.model, TITLE_PROMPT % item["title"], CN_title)
+                    self.cache.put(self.model, SUMMARY_PROMPT % item["summary"], CN_summary)
+
+        failed = [item for item in items if item["id"] not in fresh]
+        if failed and len(items) > 1:
+            if len(failed) == len(items):
+                mid = len(items) // 2
+                parts = [items[:mid], items[mid:]]
+            else:
+                parts = [failed]
+            for part in parts:
+                self._translate_batch(part, max_tokens, translations)
+
+    def chat(self, messages, temperature=0.7, max_tokens=2000, response_format=None):
+        """
+        发送一次chat completion请求并返回回复内容，失败时抛出异常。
+        """
+        extra = {"response_format": response_format} if response_format else {}
+        # 预扣token：输入加上与输入大致等长的译文
+        estimated = 2 * sum(estimate_tokens(m["content"]) for m in messages)
+        chat_completion = self.request(
+            lambda: self.client.chat.completions.create(
+                messages=messages,
+                model=self.model,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                **extra
+            ),
+            estimated,
+        )
+        return chat_completion.choices[0].message.content
+
+    def embed(self, texts, model, dimensions=None):
+        """
+        批量计算文本向量（embeddings接口），按输入顺序返回，失败时抛出异常。
+        """
+        extra = {"dimensions": dimensions} if dimensions else {}
+        estimated = sum(estimate_tokens(text) for text in texts)
+        response = self.request(lambda: self.client.embeddings.create(model=model, input=texts, **extra), estimated)
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+    def request(self, create, estimated):
+        """
+        经过限流器发送一次请求（create为实际调用SDK的函数），可重试的错误按指数退避重试，返回SDK的响应。
+        """
+        delay = 1.0
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire(estimated)
+            try:
+                response = create()
+            except RETRYABLE_ERRORS as e:
+                self.rate_limiter.adjust(-estimated)  # 失败的请求不计入token用量
+                if attempt == self.max_retries:
+                    raise
+                wait = retry_after_seconds(e)
+                if wait is None:
+                    wait = delay + random.uniform(0, delay / 2)
+                print(f"请求失败（{e.__class__.__name__}），{wait:.1f}秒后重试... ({attempt+1}/{self.max_retries})")
+                time.sleep(wait)
+                delay = min(delay * 2, 60)
+                continue
+
+            if getattr(response, "usage", None) is not None:
+                self.rate_limiter.adjust(response.usage.total_tokens - estimated)
+            return response
+
+def parse_batch_translations(content, expected_ids):
+    """
+    解析批量翻译的JSON回复，只保留id在expected_ids中且标题、摘要均非空的条目，返回{id: (CN_title, CN_summary)}。
+    """
+    data = json.loads(content)
+    if isinstance(data, dict):
+        data = data.get("translations", [])
+    if not isinstance(data, list):
+        raise ValueError("批量翻译回复不是JSON数组。")
+
+    translations = {}
+    for entry in data:
+        if not isinstance(entry, dict) or entry.get("id") not in expected_ids:
+            continue
+        CN_title, CN_summary = entry.get("CN_title"), entry.get("CN_summary")
+        if isinstance(CN_title, str) and isinstance(CN_summary, str) and CN_title.strip() and CN_summary.strip():
+            translations[entry["id"]] = (CN_title.strip(), CN_summary.strip())
+    return translations
+
+# 哈希向量使用的英文分词和停用词（停用词几乎出现在每篇摘要中，只会让向量彼此更像）
+TOKEN_RE = re.compile(r"[a-z][a-z0-9\-]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by can for from has have in is it its of on or our that the their this "
+    "to we which with these those such than then there into using based via over show paper propose "
+    "proposed approach method methods results new also not".split()
+)
+
+class HashingEmbedder:
+    """
+    不依赖任何外部服务的文本向量：对标题和摘要的词和相邻词对做特征哈希（带符号，词频取对数），再做L2归一化。
+    效果不如语义模型，但离线可用、结果确定，适合作为默认实现。
+    """
+    def __init__(self, dim=256):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def embed(self, texts):
+        return [self._embed_one(text) for text in texts]
+
+    def _embed_one(self, text):
+        tokens = [token for token in TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+        features = Counter(tokens)
+        features.update(f"{first} {second}" for first, second in zip(tokens, tokens[1:]))
+        vector = [0.0] * self.dim
+        for feature, count in features.items():
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            index = int.from_bytes(digest[:4], "little") % self.dim
+            sign = 1.0 if digest[4] & 1 else -1.0
+            vector[index] += sign * (1.0 + math.log(count))
+        return normalize_vector(vector)
+
+class OpenAIEmbedder:
+    """
+    通过OpenAI（或兼容服务）的embeddings接口计算向量，复用ChatGPTModel的客户端、限流器和重试逻辑。
+    """
+    def __init__(self, chatgpt, model="text-embedding-3-small", dim=256):
+        self.chatgpt = chatgpt
+        self.model = model
+        self.dim = dim
+        self.name = f"{model}-{dim}"
+
+    def embed(self, texts):
+        return [normalize_vector(vector) for vector in self.chatgpt.embed(texts, self.model, self.dim)]
+
+def normalize_vector(vector):
+    norm = math.sqrt(sum(value * value for value in vector))
+    return [value / norm for value in vector] if norm else vector
+
+def pack_vector(vector):
+    """
+    向量以float32小端序保存为BLOB，API直接按numpy的<f4读取。
+    """
+    packed = array("f", vector)
+    if sys.byteorder != "little":
+        packed.byteswap()
+    return packed.tobytes()
 
 class Config:
     """
@@ -123,147 +527,1404 @@ class Config:
     
     def categories(self):
         return [category.strip() for category in self.config['settings'].get('categories').split(',')]
-    
+
+    def harvest_mode(self):
+        return self.config.get('settings', 'harvest_mode', fallback='unified').strip()
+
+    def db_pool_size(self):
+        return int(self.config.get('settings', 'db_pool_size', fallback='3'))
+
+    def dedup_chunk_size(self):
+        return int(self.config.get('settings', 'dedup_chunk_size', fallback='500'))
+
+    def chatgpt_model(self):
+        return self.config.get('chatgpt', 'model', fallback='gpt-3.5-turbo-0125')
+
+    def chatgpt_base_url(self):
+        return self.config.get('chatgpt', 'base_url', fallback=None) or None
+
+    def translate_concurrency(self):
+        return int(self.config.get('chatgpt', 'concurrency', fallback='4'))
+
+    def requests_per_minute(self):
+        return int(self.config.get('chatgpt', 'requests_per_minute', fallback='0'))
+
+    def tokens_per_minute(self):
+        return int(self.config.get('chatgpt', 'tokens_per_minute', fallback='0'))
+
+    def chatgpt_max_retries(self):
+        return int(self.config.get('chatgpt', 'max_retries', fallback='5'))
+
+    def translate_batch_size(self):
+        return int(self.config.get('chatgpt', 'batch_size', fallback='5'))
+
+    def batch_max_tokens(self):
+        return int(self.config.get('chatgpt', 'batch_max_tokens', fallback='4000'))
+
+    def cache_path(self):
+        return self.config.get('cache', 'path', fallback='translation_cache.db')
+
+    def cache_max_entries(self):
+        return int(self.config.get('cache', 'max_entries', fallback='100000'))
+
+    def cache_ttl_days(self):
+        return int(self.config.get('cache', 'ttl_days', fallback='90'))
+
+    def insert_batch_size(self):
+        return int(self.config.get('settings', 'insert_batch_size', fallback='20'))
+
+    def upsert_chunk_size(self):
+        return int(self.config.get('settings', 'upsert_chunk_size', fallback='500'))
+
+    def insert_interval(self):
+        return int(self.config.get('settings', 'insert_interval_seconds', fallback='10'))
+
+    def incremental(self):
+        return self.config.getboolean('settings', 'incremental', fallback=True)
+
+    def watermark_overlap_hours(self):
+        return float(self.config.get('settings', 'watermark_overlap_hours', fallback='36'))
+
+    def state_path(self):
+        return self.config.get('state', 'path', fallback='arxiv_state.db')
+
+    def backfill_workers(self):
+        return int(self.config.get('backfill', 'workers', fallback='3'))
+
+    def backfill_window_days(self):
+        return int(self.config.get('backfill', 'window_days', fallback='1'))
+
+    def arxiv_delay_seconds(self):
+        return float(self.config.get('backfill', 'delay_seconds', fallback='3'))
+
+    def ledger_enabled(self):
+        return self.config.getboolean('state', 'ledger', fallback=True)
+
+    def ledger_max_attempts(self):
+        return int(self.config.get('state', 'max_attempts', fallback='3'))
+
+    def ledger_abandoned_keep_days(self):
+        return int(self.config.get('state', 'abandoned_keep_days', fallback='30'))
+
+    def embeddings_enabled(self):
+        return self.config.getboolean('embeddings', 'enabled', fallback=True)
+
+    def embeddings_provider(self):
+        return self.config.get('embeddings', 'provider', fallback='hashing').strip()
+
+    def embeddings_model(self):
+        return self.config.get('embeddings', 'model', fallback='text-embedding-3-small')
+
+    def embeddings_dim(self):
+        return int(self.config.get('embeddings', 'dim', fallback='256'))
+
+# 进程内已知entry_id缓存，跨定时任务保留，已确认存在的文章不再重复查询数据库
+known_entry_ids = set()
+KNOWN_ENTRY_IDS_LIMIT = 200000
+
+def remember_entry_ids(entry_ids):
+    """
+    记录已存在于数据库中的entry_id。缓存超过上限时整体清空，避免长期运行时内存无限增长。
+    """
+    if len(known_entry_ids) > KNOWN_ENTRY_IDS_LIMIT:
+        known_entry_ids.clear()
+    known_entry_ids.update(entry_ids)
+
+def duplicates_query(table_name, column):
+    return f"""
+    SELECT COUNT(*) FROM (
+        SELECT {column} FROM {table_name} WHERE {column} IS NOT NULL GROUP BY {column} HAVING COUNT(*) > 1
+    ) duplicates
+    """
+
 class Database:
     """
     数据库操作类，用于管理与MySQL数据库的连接和操作。
-    包括检查文章是否已存在于数据库中以及插入新文章。
+    包括检查文章是否已存在于数据库中以及插入新文章。连接来自连接池，用完后close()即归还。
     """
-    def __init__(self, db_config):
+    def __init__(self, db_config, pool_size=3):
         self.db_config = db_config
+        self.pool = pooling.MySQLConnectionPool(pool_name="arxiv_auto", pool_size=pool_size, **db_config)
 
     def get_connection(self):
-        return mysql.connector.connect(**self.db_config)
+        # 池中的连接在两次定时任务之间可能已被MySQL按wait_timeout断开，取出时检查并按需重连
+        conn = self.pool.get_connection()
+        conn.ping(reconnect=True, attempts=3, delay=1)
+        return conn
     
     def article_exists(self, entry_id, table_name):
-        query = f"SELECT COUNT(1) FROM {table_name} WHERE entry_id = %s"
-        with self.get_connection() as conn:
+        return bool(self.existing_entry_ids([entry_id], table_name))
+
+    def existing_entry_ids(self, entry_ids, table_name, chunk_size=500):
+        """
+        批量查询已存在于数据库中的entry_id。按chunk_size分块执行IN (...)查询，所有分块共用同一个连接。
+        """
+        entry_ids = list(dict.fromkeys(entry_ids))
+        existing = set()
+        if not entry_ids:
+            return existing
+
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            for start in range(0, len(entry_ids), chunk_size):
+                chunk = entry_ids[start:start + chunk_size]
+                placeholders = ", ".join(["%s"] * len(chunk))
+                cursor.execute(f"SELECT entry_id FROM {table_name} WHERE entry_id IN ({placeholders})", chunk)
+                existing.update(row[0] for row in cursor.fetchall())
+            cursor.close()
+        finally:
+            conn.close()
+        return existing
+
+    def filter_new_articles(self, articles, table_name, chunk_size=500):
+        """
+        批量去重：先查进程内缓存，再对剩余的entry_id批量查询数据库，返回数据库中尚不存在的文章（同批次内重复的只保留一篇）。
+        """
+        unknown = [article for article in articles if article.entry_id not in known_entry_ids]
+        existing = self.existing_entry_ids([article.entry_id for article in unknown], table_name, chunk_size)
+        remember_entry_ids(existing)
+
+        new_articles = []
+        seen = set()
+        for article in unknown:
+            if article.entry_id in existing or article.entry_id in seen:
+                continue
+            seen.add(article.entry_id)
+            new_articles.append(article)
+        return new_articles
+
+    def has_unique_index(self, table_name, column):
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f"SHOW INDEX FROM {table_name} WHERE Column_name = '{column}' AND Non_unique = 0")
+            found = bool(cursor.fetchall())
+            cursor.close()
+        finally:
+            conn.close()
+        return found
+
+    def ensure_schema(self, table_name):
+        """
+        启动时执行的幂等迁移，为旧版建表语句创建的表补齐索引和列（新表见README中的建表语句）。
+        每项迁移先用检查语句判断是否已完成，未完成才执行；失败时只打印提示，不影响收录。迁移不会删除数据。
+        """
+        migrations = [
+            # API按日期查询时使用updated_date，不再对updated套DATE()导致全表扫描
+            (
+                "updated_date生成列及索引",
+                f"SHOW COLUMNS FROM {table_name} LIKE 'updated_date'",
+                [
+                    f"""
+                    ALTER TABLE {table_name}
+                        ADD COLUMN updated_date DATE AS (DATE(updated)) STORED,
+                        ADD INDEX idx_updated_date (updated_date, updated)
+                    """
+                ],
+            ),
+            # 分类关联表，API按分类过滤和计数时走(category, updated_date)索引；旧数据用backfill-categories回填
+            (
+                f"{table_name}_categories分类关联表",
+                f"SHOW TABLES LIKE '{table_name}_categories'",
+                [
+                    f"""
+                    CREATE TABLE IF NOT EXISTS {table_name}_categories (
+                        article_id INT NOT NULL,
+                        category VARCHAR(64) NOT NULL,
+                        updated_date DATE NOT NULL,
+                        PRIMARY KEY (article_id, category),
+                        KEY idx_category_date (category, updated_date)
+                    )
+                    """
+                ],
+            ),
+            # 按天重算分类计数时使用
+            (
+                f"{table_name}_categories按日期索引",
+                f"SHOW INDEX FROM {table_name}_categories WHERE Key_name = 'idx_date_category'",
+                [f"ALTER TABLE {table_name}_categories ADD INDEX idx_date_category (updated_date, category)"],
+            ),
+            # 每天每个分类的文章数汇总表，API的分类计数（包括全部时间）直接读取它
+            (
+                f"{table_name}_category_counts分类计数汇总表",
+                f"SHOW TABLES LIKE '{table_name}_category_counts'",
+                [
+                    f"""
+                    CREATE TABLE IF NOT EXISTS {table_name}_category_counts (
+                        updated_date DATE NOT NULL,
+                        category VARCHAR(64) NOT NULL,
+                        count INT NOT NULL,
+                        PRIMARY KEY (updated_date, category),
+                        KEY idx_category (category, count)
+                    )
+                    """,
+                    f"""
+                    INSERT INTO {table_name}_category_counts (updated_date, category, count)
+                    SELECT updated_date, category, COUNT(*) FROM {table_name}_categories GROUP BY updated_date, category
+                    """,
+                ],
+            ),
+            # 数据版本号，每次写入时递增（global及涉及的每一天），API据此让响应缓存失效
+            (
+                f"{table_name}_versions数据版本表",
+                f"SHOW TABLES LIKE '{table_name}_versions'",
+                [
+                    f"""
+                    CREATE TABLE IF NOT EXISTS {table_name}_versions (
+                        scope VARCHAR(16) NOT NULL PRIMARY KEY,
+                        version BIGINT NOT NULL
+                    )
+                    """
+                ],
+            ),
+            # 文章向量表，API同步到本地的内存映射矩阵中做相似文章检索；seq在每次写入（REPLACE）时重新分配，API按seq增量同步
+            (
+                f"{table_name}_embeddings文章向量表",
+                f"SHOW TABLES LIKE '{table_name}_embeddings'",
+                [
+                    f"""
+                    CREATE TABLE IF NOT EXISTS {table_name}_embeddings (
+                        seq BIGINT NOT NULL AUTO_INCREMENT,
+                        article_id INT NOT NULL,
+                        model VARCHAR(64) NOT NULL,
+                        dim SMALLINT NOT NULL,
+                        vector BLOB NOT NULL,
+                        PRIMARY KEY (article_id),
+                        UNIQUE KEY uniq_seq (seq)
+                    )
+                    """
+                ],
+            ),
+            # 不含版本号的paper_id，同一篇论文的新版本（v2、v3...）更新原有记录而不是新增一行
+            (
+                "paper_id列",
+                f"SHOW COLUMNS FROM {table_name} LIKE 'paper_id'",
+                [f"ALTER TABLE {table_name} ADD COLUMN paper_id VARCHAR(255) NULL AFTER entry_id"],
+            ),
+            (
+                "paper_id回填",
+                f"SELECT 1 FROM DUAL WHERE NOT EXISTS (SELECT 1 FROM {table_name} WHERE paper_id IS NULL)",
+                [f"UPDATE {table_name} SET paper_id = REGEXP_REPLACE(entry_id, 'v[0-9]+$', '') WHERE paper_id IS NULL"],
+            ),
+            # 同一篇论文已有多个版本时不加索引，由dedup-versions清理（会删除数据，需要手动运行）
+            (
+                "paper_id唯一索引",
+                f"SHOW INDEX FROM {table_name} WHERE Key_name = 'uniq_paper_id'",
+                [f"ALTER TABLE {table_name} ADD UNIQUE INDEX uniq_paper_id (paper_id)"],
+                duplicates_query(table_name, "paper_id"),
+            ),
+            # 批量去重的IN (...)查询和upsert依赖entry_id唯一索引，有重复数据时同样交给dedup-versions
+            (
+                "entry_id唯一索引",
+                f"SHOW INDEX FROM {table_name} WHERE Column_name = 'entry_id' AND Non_unique = 0",
+                [f"ALTER TABLE {table_name} ADD UNIQUE INDEX uniq_entry_id (entry_id)"],
+                duplicates_query(table_name, "entry_id"),
+            ),
+            # 每个分类全部时间的文章数，由refresh_category_counts随按天汇总一起维护，API的全部时间计数不再对整段历史求和
+            (
+                f"{table_name}_category_totals分类总数表",
+                f"SHOW TABLES LIKE '{table_name}_category_totals'",
+                [
+                    f"""
+                    CREATE TABLE IF NOT EXISTS {table_name}_category_totals (
+                        category VARCHAR(64) NOT NULL PRIMARY KEY,
+                        count INT NOT NULL
+                    )
+                    """,
+                    f"""
+                    INSERT INTO {table_name}_category_totals (category, count)
+                    SELECT category, SUM(count) FROM {table_name}_category_counts GROUP BY category
+                    """,
+                ],
+            ),
+            # API的/search使用的全文索引：英文标题和摘要用默认分词
+            (
+                "标题和摘要全文索引",
+                f"SHOW INDEX FROM {table_name} WHERE Key_name = 'ft_title_summary'",
+                [f"ALTER TABLE {table_name} ADD FULLTEXT INDEX ft_title_summary (title, summary)"],
+            ),
+            # 中文翻译没有空格分词，使用ngram分词器
+            (
+                "中文标题和摘要全文索引",
+                f"SHOW INDEX FROM {table_name} WHERE Key_name = 'ft_cn_title_summary'",
+                [f"ALTER TABLE {table_name} ADD FULLTEXT INDEX ft_cn_title_summary (CN_title, CN_summary) WITH PARSER ngram"],
+            ),
+        ]
+
+        conn = self.get_connection()
+        try:
             cursor = conn.cursor()
-            cursor.execute(query, (entry_id,))
-            result = cursor.fetchone()
-            return result[0] > 0
+            for description, check_query, statements, *guard in migrations:
+                try:
+                    cursor.execute(check_query)
+                    if cursor.fetchall():
+                        continue
+                    if guard:
+                        cursor.execute(guard[0])
+                        duplicates = cursor.fetchone()[0]
+                        if duplicates:
+                            print(f"未迁移{table_name}（{description}）：有{duplicates}组重复记录，"
+                                  f"确认后运行 python3 arxiv_auto.py dedup-versions 清理。")
+                            continue
+                    print(f"迁移{table_name}：{description}...")
+                    for statement in statements:
+                        cursor.execute(statement)
+                    conn.commit()
+                except Error as e:
+                    print(f"迁移失败（{description}）：{e}")
+            cursor.close()
+        finally:
+            conn.close()
+
+class Watermarks:
+    """
+    持久化每个查询（分类）的高水位：上次成功处理到的最新updated时间及对应的entry_id，保存在本地SQLite中。
+    下次抓取时只需要读取比高水位更新的文章。
+    """
+    def __init__(self, path='arxiv_state.db'):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS watermarks (
+                query TEXT PRIMARY KEY,
+                updated TEXT NOT NULL,
+                entry_id TEXT NOT NULL
+            )
+            """
+        )
+        self.conn.commit()
+
+    def get(self, query):
+        row = self.conn.execute("SELECT updated, entry_id FROM watermarks WHERE query = ?", (query,)).fetchone()
+        if row is None:
+            return None
+        return datetime.fromisoformat(row[0]), row[1]
+
+    def set(self, query, updated, entry_id):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO watermarks (query, updated, entry_id) VALUES (?, ?, ?)",
+            (query, updated.isoformat(), entry_id),
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+class BackfillCheckpoints:
+    """
+    历史回填的断点：每个时间窗口（以完整的arXiv查询语句为键）处理完成后记录一行，重新运行同样的回填命令时跳过已完成的窗口。
+    """
+    def __init__(self, path='arxiv_state.db'):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS backfill_windows (
+                query TEXT PRIMARY KEY,
+                fetched INTEGER NOT NULL,
+                inserted INTEGER NOT NULL,
+                finished_at TEXT NOT NULL
+            )
+            """
+        )
+        self.conn.commit()
 
-def fetch_recent_articles(category, max_results=500):
+    def done(self, query):
+        return self.conn.execute("SELECT 1 FROM backfill_windows WHERE query = ?", (query,)).fetchone() is not None
+
+    def mark_done(self, query, fetched, inserted):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO backfill_windows (query, fetched, inserted, finished_at) VALUES (?, ?, ?, ?)",
+            (query, fetched, inserted, datetime.now().isoformat()),
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+class JobLedger:
     """
-    获取最近更新的文章列表。通过arXiv API获取指定分类下最新的文章列表。
+    本地SQLite任务账本，记录每篇新文章的处理状态：fetched（待翻译）、translated（已翻译，保存译文，待入库）、
+    inserted（已入库）、failed（翻译失败，等待重试）、abandoned（超过max_attempts次仍失败，不再重试）。
+    进程中途退出后，下次运行可以从账本恢复，已经付费完成的翻译不会重做。
+    abandoned的记录保留abandoned_keep_days天，期间再次抓取到的同一篇文章直接跳过；删除后重新获得max_attempts次机会。
+    """
+    def __init__(self, path='arxiv_state.db', max_attempts=3, abandoned_keep_days=30):
+        self.max_attempts = max_attempts
+        self.abandoned_keep_days = abandoned_keep_days
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                entry_id TEXT PRIMARY KEY,
+                state TEXT NOT NULL,
+                article TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_state ON jobs (state)")
+        self.conn.commit()
+
+    def record_fetched(self, articles):
+        # 已在账本中的文章保持原状态，失败次数不会因为重新抓取而清零
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO jobs (entry_id, state, article, updated_at) VALUES (?, 'fetched', ?, ?)",
+            [(article.entry_id, json.dumps(article.to_dict(), ensure_ascii=False), time.time()) for article in articles],
+        )
+        self.conn.commit()
+
+    def record_translated(self, article):
+        self.conn.execute(
+            "UPDATE jobs SET state = 'translated', article = ?, last_error = NULL, updated_at = ? WHERE entry_id = ?",
+            (json.dumps(article.to_dict(), ensure_ascii=False), time.time(), article.entry_id),
+        )
+        self.conn.commit()
+
+    def record_failed(self, article, error="翻译失败"):
+        self.conn.execute(
+            """
+            UPDATE jobs SET attempts = attempts + 1, last_error = ?, updated_at = ?,
+                state = CASE WHEN attempts + 1 >= ? THEN 'abandoned' ELSE 'failed' END
+            WHERE entry_id = ?
+            """,
+            (error, time.time(), self.max_attempts, article.entry_id),
+        )
+        self.conn.commit()
+
+    def record_inserted(self, entry_ids):
+        self.conn.executemany(
+            "UPDATE jobs SET state = 'inserted', updated_at = ? WHERE entry_id = ?",
+            [(time.time(), entry_id) for entry_id in entry_ids],
+        )
+        self.conn.commit()
+
+    def abandoned_ids(self, entry_ids, chunk_size=500):
+        """
+        entry_ids中已放弃重试（abandoned）的文章。
+        """
+        entry_ids = list(entry_ids)
+        abandoned = set()
+        for i in range(0, len(entry_ids), chunk_size):
+            chunk = entry_ids[i:i + chunk_size]
+            placeholders = ", ".join(["?"] * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT entry_id FROM jobs WHERE state = 'abandoned' AND entry_id IN ({placeholders})", chunk
+            ).fetchall()
+            abandoned.update(row[0] for row in rows)
+        return abandoned
+
+    def _articles(self, states):
+        placeholders = ", ".join(["?"] * len(states))
+        rows = self.conn.execute(
+            f"SELECT article FROM jobs WHERE state IN ({placeholders}) ORDER BY updated_at", states
+        ).fetchall()
+        return [Article.from_dict(json.loads(row[0])) for row in rows]
+
+    def translated_articles(self):
+        """
+        已翻译但尚未确认入库的文章（带译文）。
+        """
+        return self._articles(["translated"])
+
+    def retry_articles(self):
+        """
+        翻译未完成（进程中途退出）或失败但未超过重试次数的文章。
+        """
+        return self._articles(["fetched", "failed"])
+
+    def prune(self, keep_days=7):
+        """
+        删除入库超过keep_days天的记录，以及放弃重试超过abandoned_keep_days天的记录。
+        """
+        now = time.time()
+        self.conn.execute(
+            "DELETE FROM jobs WHERE (state = 'inserted' AND updated_at < ?) OR (state = 'abandoned' AND updated_at < ?)",
+            (now - keep_days * 86400, now - self.abandoned_keep_days * 86400),
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+def category_query(category):
+    """
+    生成arXiv查询语句。多个分类合并为一次OR查询（cat:cs.AI OR cat:cs.LG），单个分类保持原有的查询方式。
+    """
+    if isinstance(category, str):
+        return category
+    if len(category) == 1:
+        return category[0]
+    return " OR ".join(f"cat:{c}" for c in category)
+
+def iter_recent_articles(category, max_results=500, since=None):
+    """
+    按更新时间从新到旧逐篇产出指定分类（或分类列表）下的文章，遇到更新时间早于since的文章即停止，不再请求后面的页。
     """
-    client = arxiv.Client()
     search = arxiv.Search(
-        query=category,
+        query=category_query(category),
         max_results=max_results,
         sort_by=arxiv.SortCriterion.LastUpdatedDate
     )
+    for article in iter_search_results(arxiv.Client(), search):
+        if since is not None and article.updated < since:
+            break
+        yield article
 
-    articles_list = []
+def iter_search_results(client, search):
+    """
+    逐篇产出一次arXiv检索的结果（按需翻页），按entry_id去重。
+    """
+    seen = set()
     for r in client.results(search):
-        article = Article(
+        # 翻页期间有文章更新时，同一篇文章可能在相邻两页各出现一次
+        if r.entry_id in seen:
+            continue
+        seen.add(r.entry_id)
+        yield Article(
             r.authors, r.categories, r.comment, r.doi,
             r.entry_id, r.journal_ref, r.links,
             r.primary_category, r.published, r.summary, r.title, r.updated
         )
-        articles_list.append(article)
 
-    return articles_list
+def fetch_recent_articles(category, max_results=500, since=None):
+    """
+    获取最近更新的文章列表。通过arXiv API获取指定分类下最新的文章列表（只到高水位since为止）。
+    """
+    return list(iter_recent_articles(category, max_results, since))
+
+def iter_fetched_articles(category, max_results=500, since=None, max_retries=3):
+    """
+    带重试的流式抓取：出错时从头重新请求，已产出的文章不会重复产出，超过max_retries次后抛出异常。
+    """
+    yielded = set()
+    retries = 0
+    while True:
+        try:
+            for article in iter_recent_articles(category, max_results, since):
+                if article.entry_id not in yielded:
+                    yielded.add(article.entry_id)
+                    yield article
+            return
+        except Exception as e:
+            retries += 1
+            if retries >= max_retries:
+                raise
+            print(f"An error occurred: {e}, Retrying... ({retries}/{max_retries})")
+
+def date_windows(start, end, window_days=1):
+    """
+    把日期区间[start, end]（含两端）切成每段window_days天的窗口，返回(窗口第一天, 窗口最后一天)的列表。
+    """
+    windows = []
+    current = start
+    while current <= end:
+        last = min(current + timedelta(days=window_days - 1), end)
+        windows.append((current, last))
+        current = last + timedelta(days=1)
+    return windows
+
+def submitted_query(categories, first_day, last_day):
+    """
+    某个时间窗口内提交的文章的arXiv查询语句，例如(cat:cs.AI OR cat:cs.LG) AND submittedDate:[202401010000 TO 202401072359]。
+    """
+    cats = " OR ".join(f"cat:{category}" for category in categories)
+    return f"({cats}) AND submittedDate:[{first_day:%Y%m%d}0000 TO {last_day:%Y%m%d}2359]"
 
-def fetch_process_insert_articles(category, table_name, max_results):
+class RequestSpacer:
     """
-    处理文章列表：翻译和插入数据库，避免重复。集成了文章获取、翻译和插入数据库的全过程，只对数据库中不存在的新文章进行处理。
+    进程内共享的请求间隔控制：无论来自哪个线程，两次请求的开始时间至少相隔delay_seconds秒。
     """
-    config = Config()
-    model = ChatGPTModel(api_key=config.api_key())
-    db = Database(config.db_config())
+    def __init__(self, delay_seconds=3):
+        self.delay_seconds = delay_seconds
+        self.last_request = None
+        self.lock = threading.Lock()
 
-    print(f"（{datetime.now().date()}）：开始检索{category}文章...")
-    max_retries = 3  # 设置最大重试次数
+    def wait(self):
+        # 持锁睡眠：等待中的线程按顺序一个一个放行
+        with self.lock:
+            if self.last_request is not None:
+                to_sleep = self.last_request + self.delay_seconds - time.monotonic()
+                if to_sleep > 0:
+                    time.sleep(to_sleep)
+            self.last_request = time.monotonic()
+
+class ThrottledClient(arxiv.Client):
+    """
+    每次翻页请求（包括arxiv库内部的重试，它们会再次调用_parse_feed）都先经过共享的RequestSpacer。
+    """
+    def __init__(self, spacer, **kwargs):
+        super().__init__(delay_seconds=0, **kwargs)
+        self.spacer = spacer
+
+    def _parse_feed(self, url, first_page=True, _try_index=0):
+        self.spacer.wait()
+        return super()._parse_feed(url, first_page=first_page, _try_index=_try_index)
+
+def fetch_window(query, spacer, max_retries=3):
+    """
+    抓取一个时间窗口内的全部文章（按提交时间从旧到新），出错时整个窗口重新抓取，超过max_retries次后抛出异常。
+    """
+    search = arxiv.Search(
+        query=query,
+        max_results=None,
+        sort_by=arxiv.SortCriterion.SubmittedDate,
+        sort_order=arxiv.SortOrder.Ascending
+    )
     retries = 0
-    # 检索文章
-    while retries < max_retries:
+    while True:
         try:
-            articles = fetch_recent_articles(category, max_results)
-            break
+            client = ThrottledClient(spacer, page_size=500, num_retries=3)
+            return list(iter_search_results(client, search))
         except Exception as e:
             retries += 1
+            if retries >= max_retries:
+                raise
             print(f"An error occurred: {e}, Retrying... ({retries}/{max_retries})")
 
-    # 检查是否超出重试次数
-    if retries == max_retries:
-        print(f"无法正确从Arxiv.org获取文章。")
-        return False
+def chunked(iterable, size):
+    """
+    把可迭代对象按size切成列表逐块产出，最后一块可能不足size。
+    """
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def growing_chunks(iterable, first_size, max_size):
+    """
+    像chunked一样逐块产出，但第一块只有first_size个，之后每块翻倍，直到max_size。
+    下游可以在只到达少量元素时就开始工作，后面的块仍然足够大，请求次数不会太多。
+    """
+    iterator = iter(iterable)
+    size = max(1, min(first_size, max_size))
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+        size = min(size * 2, max_size)
+
+def iter_new_articles(articles, db, table_name, chunk_size=500, ledger=None, first_chunk_size=None):
+    """
+    流式去重：逐块批量去重，产出数据库中尚不存在的文章。块从first_chunk_size篇开始（默认等于chunk_size）逐块翻倍到chunk_size，
+    第一块去重完就可以开始翻译，不必等抓取攒满chunk_size篇。
+    给定ledger时把新文章登记为fetched，并把账本中其实已经入库的文章标记为inserted；已放弃重试（abandoned）的文章不再产出。
+    """
+    for chunk in growing_chunks(articles, first_chunk_size or chunk_size, chunk_size):
+        new_articles = db.filter_new_articles(chunk, table_name, chunk_size)
+        if ledger is not None:
+            new_ids = {article.entry_id for article in new_articles}
+            ledger.record_inserted([article.entry_id for article in chunk if article.entry_id not in new_ids])
+            ledger.record_fetched(new_articles)
+            abandoned = ledger.abandoned_ids(new_ids)
+            if abandoned:
+                new_articles = [article for article in new_articles if article.entry_id not in abandoned]
+        yield from new_articles
+
+def translate_article_batch(articles, model, max_tokens=4000):
+    """
+    用一次批量请求翻译一组文章，批量结果中缺失的文章退回逐篇翻译。返回每篇文章是否翻译成功。
+    请求重试到上限后仍然失败时（BatchTranslationInterrupted）保留已经得到的译文，其余文章按失败处理，不再逐篇重新请求。
+    """
+    if len(articles) == 1:
+        return [articles[0].gpt_CN_translate(model)]
+
+    items = [{"id": article.entry_id, "title": article.title, "summary": article.summary} for article in articles]
+    interrupted = False
+    try:
+        translations = model.translate_batch(items, max_tokens)
+    except BatchTranslationInterrupted as e:
+        print(f"批量翻译中断：{e}，已完成{len(e.translations)}/{len(items)}篇。")
+        translations, interrupted = e.translations, True
+    results = []
+    for article in articles:
+        if article.entry_id in translations:
+            article.CN_title, article.CN_summary = translations[article.entry_id]
+            results.append(True)
+        else:
+            results.append(False if interrupted else article.gpt_CN_translate(model))
+    return results
+
+def iter_translated(articles, model, concurrency=4, batch_size=1, batch_max_tokens=4000):
+    """
+    流式并发翻译：从articles中每次取batch_size篇打包成一个批量请求，同时在途的请求不超过concurrency个，
+    限流与退避由model负责。按完成顺序产出(article, 是否翻译成功)；只有在有空闲名额时才会从上游拉取新文章。
+    """
+    batches = chunked(articles, max(1, batch_size))
+    pending = {}
+    done = 0
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        def submit_next():
+            batch = next(batches, None)
+            if batch is not None:
+                pending[executor.submit(translate_article_batch, batch, model, batch_max_tokens)] = batch
+
+        for _ in range(max(1, concurrency)):
+            submit_next()
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                batch = pending.pop(future)
+                try:
+                    results = future.result()
+                except Exception as e:
+                    print(f"An error occurred: {e}")
+                    results = [False] * len(batch)
+                for article, ok in zip(batch, results):
+                    done += 1
+                    print(f"Job. {done}: {'成功' if ok else '失败'} - {article.title}")
+                    yield article, ok
+                submit_next()
 
-    to_translate_articles = []
-    if articles:
+def run_pipeline(ctx, articles):
+    """
+    流式处理管道：抓取 → 批量去重 → 并发翻译 → 小批量插入。各阶段都是按需拉取的生成器，内存占用只与在途批次有关。
+    翻译成功的文章每凑满insert_batch_size篇（或距上次提交超过insert_interval秒）就提交一次，中途中断时已提交的部分不会丢失。
+    ctx中有任务账本时每篇文章的状态变化都会写入账本；有embedder时入库后立即计算文章向量。
+    返回统计信息：newest为抓取到的最新文章，oldest_failed为翻译或插入失败的文章中更新时间最早的一篇（都可能为None）。
+    """
+    config, db, table_name, ledger, embedder = ctx.config, ctx.db, ctx.table_name, ctx.ledger, ctx.embedder
+    stats = {"fetched": 0, "new": 0, "inserted": 0, "failed": 0, "newest": None, "oldest_failed": None}
+
+    def fetched():
         for article in articles:
-            if not db.article_exists(article.entry_id, table_name):
-                to_translate_articles.append(article)
-    else:
-        print(f"（{datetime.now().date()}）：没有获取到任何{category}文章。")
-    
+            stats["fetched"] += 1
+            if stats["newest"] is None:
+                stats["newest"] = article
+            yield article
+
+    def new_articles():
+        # 第一块正好够翻译阶段填满所有在途请求
+        first_chunk = config.translate_concurrency() * config.translate_batch_size()
+        for article in iter_new_articles(fetched(), db, table_name, config.dedup_chunk_size(), ledger, first_chunk):
+            stats["new"] += 1
+            yield article
+
+    def mark_failed(failed):
+        for article in failed:
+            stats["failed"] += 1
+            if stats["oldest_failed"] is None or article.updated < stats["oldest_failed"].updated:
+                stats["oldest_failed"] = article
+
+    def flush(buffer):
+        failed = insert_articles_to_database(buffer, table_name, db, config.upsert_chunk_size())
+        failed_ids = {article.entry_id for article in failed}
+        written = [article for article in buffer if article.entry_id not in failed_ids]
+        stats["inserted"] += len(written)
+        if ledger is not None:
+            ledger.record_inserted([article.entry_id for article in written])
+        if embedder is not None and written:
+            store_embeddings(db, table_name, written, embedder)
+        mark_failed(failed)
+
+    buffer = []
+    last_flush = time.monotonic()
+    try:
+        translated = iter_translated(
+            new_articles(), ctx.model, config.translate_concurrency(),
+            config.translate_batch_size(), config.batch_max_tokens()
+        )
+        for article, ok in translated:
+            if not ok:
+                mark_failed([article])
+                if ledger is not None:
+                    ledger.record_failed(article)
+                continue
+            if ledger is not None:
+                ledger.record_translated(article)
+            buffer.append(article)
+            if len(buffer) >= config.insert_batch_size() or time.monotonic() - last_flush >= config.insert_interval():
+                flush(buffer)
+                buffer = []
+                last_flush = time.monotonic()
+    finally:
+        # 即使抓取中途失败，也先把已经翻译好的文章写入数据库
+        if buffer:
+            flush(buffer)
+    return stats
+
+def create_model(config, cache=None):
+    """
+    按配置创建ChatGPTModel。HTTP连接池按翻译并发数保持长连接，定时任务之间复用，不必每次重新握手。
+    """
+    concurrency = max(1, config.translate_concurrency())
+    http_client = httpx.Client(
+        limits=httpx.Limits(max_connections=concurrency + 2, max_keepalive_connections=concurrency + 2, keepalive_expiry=300),
+        timeout=httpx.Timeout(120.0, connect=10.0),
+    )
+    return ChatGPTModel(
+        api_key=config.api_key(), model=config.chatgpt_model(), base_url=config.chatgpt_base_url(),
+        rate_limiter=RateLimiter(config.requests_per_minute(), config.tokens_per_minute()),
+        max_retries=config.chatgpt_max_retries(), cache=cache, http_client=http_client
+    )
+
+def create_embedder(config, chatgpt=None):
+    """
+    按配置创建文章向量的计算方式：hashing（默认，离线可用）或openai（复用给定的ChatGPTModel）；未启用时返回None。
+    """
+    if not config.embeddings_enabled():
+        return None
+    if config.embeddings_provider() == 'openai':
+        return OpenAIEmbedder(chatgpt or create_model(config), config.embeddings_model(), config.embeddings_dim())
+    return HashingEmbedder(config.embeddings_dim())
+
+class HarvesterContext:
+    """
+    收录进程的长生命周期上下文：配置、MySQL连接池、OpenAI客户端（HTTP长连接）、翻译缓存、高水位和任务账本。
+    启动时创建一次，在所有定时任务之间共享，建立连接的开销不再随文章数或分类数增长。
+    """
+    def __init__(self, config=None):
+        self.config = config or Config()
+        self.table_name = self.config.articles_table()
+        self.db = Database(self.config.db_config(), self.config.db_pool_size())
+        self.cache = TranslationCache(self.config.cache_path(), self.config.cache_max_entries(), self.config.cache_ttl_days())
+        self.model = create_model(self.config, self.cache)
+        self.embedder = create_embedder(self.config, self.model)
+        self.watermarks = Watermarks(self.config.state_path()) if self.config.incremental() else None
+        self.ledger = JobLedger(
+            self.config.state_path(), self.config.ledger_max_attempts(), self.config.ledger_abandoned_keep_days()
+        ) if self.config.ledger_enabled() else None
+
+    def close(self):
+        self.model.client.close()
+        self.cache.close()
+        if self.watermarks is not None:
+            self.watermarks.close()
+        if self.ledger is not None:
+            self.ledger.close()
+
+def resume_from_ledger(ctx):
+    """
+    从任务账本恢复上次未完成的工作：已翻译但未入库的文章直接插入，翻译未完成或失败（未超过重试次数）的文章重新走处理管道。
+    """
+    config, db, table_name, ledger, embedder = ctx.config, ctx.db, ctx.table_name, ctx.ledger, ctx.embedder
+
+    translated = ledger.translated_articles()
+    if translated:
+        print(f"从任务账本恢复{len(translated)}篇已翻译但未入库的文章...")
+        pending = db.filter_new_articles(translated, table_name, config.dedup_chunk_size())
+        pending_ids = {article.entry_id for article in pending}
+        ledger.record_inserted([article.entry_id for article in translated if article.entry_id not in pending_ids])
+        failed_ids = {article.entry_id for article in insert_articles_to_database(pending, table_name, db, config.upsert_chunk_size())}
+        written = [article for article in pending if article.entry_id not in failed_ids]
+        ledger.record_inserted([article.entry_id for article in written])
+        if embedder is not None and written:
+            store_embeddings(db, table_name, written, embedder)
+
+    retry = ledger.retry_articles()
+    if retry:
+        print(f"从任务账本重试{len(retry)}篇未完成翻译的文章...")
+        stats = run_pipeline(ctx, iter(retry))
+        print(f"重试完成：成功更新{stats['inserted']}篇，失败{stats['failed']}篇。")
+
+def fetch_process_insert_articles(ctx, category, max_results, incremental=True):
+    """
+    处理文章列表：抓取、去重、翻译并插入数据库，category可以是分类列表（合并为一次查询）。返回run_pipeline的统计信息，抓取失败时返回None。
+    """
+    watermarks, ledger = (ctx.watermarks if incremental else None), ctx.ledger
+    if not isinstance(category, str):
+        category = list(category)
+    label = category if isinstance(category, str) else ", ".join(category)
+    query = category_query(category)
+    watermark = watermarks.get(query) if watermarks is not None else None
+    # 往回多抓一段：晚公布或解除暂缓的文章updated可能早于高水位，重复的文章由去重阶段过滤
+    since = watermark[0] - timedelta(hours=ctx.config.watermark_overlap_hours()) if watermark else None
+
+    print(f"（{datetime.now().date()}）：开始检索{label}文章...")
+    try:
+        # 有高水位时不受max_results限制，否则两次运行之间更新超过max_results篇时，没抓到的文章会被推进的高水位永久跳过
+        limit = None if since is not None else max_results
+        stats = run_pipeline(ctx, iter_fetched_articles(category, limit, since))
+        stats["capped"] = limit is not None and stats["fetched"] >= limit
+    except Exception as e:
+        print(f"An error occurred: {e}")
+        print(f"无法正确从Arxiv.org获取文章。")
+        return None
 
-    insert_articles = []
-    if to_translate_articles:
-        print(f"准备翻译{category}文章数目为{len(to_translate_articles)}篇。")
-        num = 0
-        for article in to_translate_articles:
-            print(f"Job. {num+1}/{len(to_translate_articles)}:") 
-            if article.gpt_CN_translate(model):
-                num += 1
-                insert_articles.append(article)
-        insert_articles_to_database(insert_articles, table_name)  # 插入新文章到数据库
-        print(f"成功更新{num}篇，失败{len(to_translate_articles)-num}篇。")
+    if not stats["fetched"]:
+        print(f"（{datetime.now().date()}）：没有获取到任何{label}文章。")
+    if stats["new"]:
+        print(f"{label}新文章{stats['new']}篇：成功更新{stats['inserted']}篇，失败{stats['failed']}篇。")
     else:
         print("没有新的文章需要更新。")
 
-def insert_articles_to_database(articles, table_name):
+    if watermarks is not None and stats["newest"] is not None:
+        # 失败的文章由任务账本负责重试；没有账本时，高水位只推进到其中最旧的一篇，下次抓取时它们会被重新获取
+        mark = stats["newest"] if ledger is not None else (stats["oldest_failed"] or stats["newest"])
+        if watermark is None or mark.updated > watermark[0]:
+            watermarks.set(query, mark.updated, mark.entry_id)
+    return stats
+
+# 写入文章表的列；paper_id冲突（同一篇论文的新版本）时除published外全部更新
+ARTICLE_COLUMNS = (
+    "title", "summary", "published", "authors", "categories", "comment", "doi", "entry_id", "paper_id",
+    "journal_ref", "links", "primary_category", "updated", "CN_title", "CN_summary",
+)
+
+def article_record(article):
+    return (article.title, article.summary, article.published,
+            ",".join(article.authors), ",".join(article.categories), article.comment,
+            article.doi, article.entry_id, article.paper_id, article.journal_ref,
+            ",".join(article.links), article.primary_category, article.updated,
+            article.CN_title, article.CN_summary)
+
+def upsert_sql(table_name, rows):
+    """
+    多行VALUES的upsert语句（相当于rewriteBatchedStatements，一次往返写入rows行）。
+    只有新记录的updated不早于已有记录时才覆盖，迟到的旧版本不会把新版本改回去；updated放在最后赋值，
+    因为MySQL按顺序求值，前面的IF比较的还是旧值。
+    """
+    columns = ", ".join(ARTICLE_COLUMNS)
+    row_placeholders = "(" + ", ".join(["%s"] * len(ARTICLE_COLUMNS)) + ")"
+    updates = [
+        f"{column} = IF(VALUES(updated) >= updated, VALUES({column}), {column})"
+        for column in ARTICLE_COLUMNS if column not in ("published", "paper_id", "updated")
+    ]
+    updates.append("updated = GREATEST(updated, VALUES(updated))")
+    return (
+        f"INSERT INTO {table_name} ({columns}) VALUES {', '.join([row_placeholders] * rows)} "
+        f"ON DUPLICATE KEY UPDATE {', '.join(updates)}"
+    )
+
+def upsert_articles(cursor, articles, table_name):
+    """
+    在当前事务中upsert一组文章，并同步分类关联表、分类计数汇总表和数据版本号。
+    """
+    cursor.execute(upsert_sql(table_name, len(articles)), [value for article in articles for value in article_record(article)])
+    affected = cursor.rowcount  # 新增计1，更新计2，内容未变计0
+    days = sync_article_categories(cursor, articles, table_name)  # 与文章在同一事务中写入分类关联表
+    refresh_category_counts(cursor, table_name, days)
+    bump_data_version(cursor, table_name, days)
+    return affected
+
+def insert_articles_to_database(articles, table_name, db, chunk_size=500):
+    """
+    将文章数据幂等地写入数据库：paper_id唯一索引保证同一篇论文只有一行，新版本（updated、摘要等变化）覆盖旧版本。
+    按chunk_size分块，每块一条多行upsert语句并单独提交；某块失败时回滚并逐篇重试，一篇坏数据不会连累整块。
+    返回写入失败的文章列表。
+    """
+    try:
+        conn = db.get_connection()
+    except Error as e:
+        print(e)
+        return list(articles)
+
+    failed = []
+    cursor = conn.cursor()
+    try:
+        for chunk in chunked(articles, chunk_size):
+            try:
+                affected = upsert_articles(cursor, chunk, table_name)
+                conn.commit()
+                print(f"{len(chunk)} records upserted ({affected} rows affected).")
+            except Error as e:
+                conn.rollback()
+                print(f"批量写入失败（{e}），逐篇重试{len(chunk)}篇文章...")
+                for article in chunk:
+                    try:
+                        upsert_articles(cursor, [article], table_name)
+                        conn.commit()
+                    except Error as e:
+                        conn.rollback()
+                        print(f"写入失败：{article.entry_id}（{e}）")
+                        failed.append(article)
+    finally:
+        cursor.close()
+        conn.close()
+
+    failed_ids = {article.entry_id for article in failed}
+    remember_entry_ids(article.entry_id for article in articles if article.entry_id not in failed_ids)
+    return failed
+
+def sync_article_categories(cursor, articles, table_name, chunk_size=500):
     """
-    将文章数据插入数据库。负责将处理过的文章数据批量插入数据库中。
+    把刚写入的文章的分类同步到分类关联表（{table_name}_categories），每篇文章的每个分类一行。
+    文章可能是新版本：先删掉它原有的分类行再写入，分类和updated_date的变化都能反映出来。
+    文章id和updated_date按entry_id批量查回，不依赖自增id连续。返回涉及的日期集合（包括文章原来所在的日期）。
     """
-    insert_query = f"""
-    INSERT INTO {table_name} 
-    (title, summary, published, authors, categories, comment, doi, entry_id, journal_ref, links, primary_category, updated, CN_title, CN_summary) 
-    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    categories_by_entry = {article.entry_id: list(article.categories) for article in articles}
+    entry_ids = list(categories_by_entry)
+    days = set()
+    for start in range(0, len(entry_ids), chunk_size):
+        chunk = entry_ids[start:start + chunk_size]
+        placeholders = ", ".join(["%s"] * len(chunk))
+        cursor.execute(f"SELECT id, entry_id, updated_date FROM {table_name} WHERE entry_id IN ({placeholders})", chunk)
+        found = cursor.fetchall()
+        if not found:
+            continue
+        article_ids = [article_id for article_id, _, _ in found]
+        id_placeholders = ", ".join(["%s"] * len(article_ids))
+        cursor.execute(f"SELECT DISTINCT updated_date FROM {table_name}_categories WHERE article_id IN ({id_placeholders})", article_ids)
+        days.update(row[0] for row in cursor.fetchall())
+        cursor.execute(f"DELETE FROM {table_name}_categories WHERE article_id IN ({id_placeholders})", article_ids)
+        rows = [
+            (article_id, category, updated_date)
+            for article_id, entry_id, updated_date in found
+            for category in dict.fromkeys(categories_by_entry[entry_id]) if category
+        ]
+        if rows:
+            cursor.execute(
+                f"INSERT INTO {table_name}_categories (article_id, category, updated_date) VALUES "
+                + ", ".join(["(%s, %s, %s)"] * len(rows)),
+                [value for row in rows for value in row],
+            )
+            days.update(row[2] for row in rows)
+    return days
+
+def refresh_category_counts(cursor, table_name, days=None):
     """
+    按天重算分类计数汇总表（{table_name}_category_counts）。只重算给定的日期，days为None时全部重算。
+    按天从关联表重新统计而不是在原值上累加，重复执行结果不变；先删除再写入，文章移到别的日期后原来的计数行不会残留。
+    这些日期前后涉及的分类，其全部时间总数（{table_name}_category_totals）也一并重算。
+    """
+    if days is not None and not days:
+        return
+    where_sql = ""
+    params = []
+    if days is not None:
+        days = sorted(days)
+        where_sql = f"WHERE updated_date IN ({', '.join(['%s'] * len(days))})"
+        params = days
+    touched_sql = f"SELECT DISTINCT category FROM {table_name}_category_counts {where_sql}"
+    touched = None
+    if days is not None:
+        cursor.execute(touched_sql, params)
+        touched = {row[0] for row in cursor.fetchall()}
+    cursor.execute(f"DELETE FROM {table_name}_category_counts {where_sql}", params)
+    cursor.execute(
+        f"""
+        INSERT INTO {table_name}_category_counts (updated_date, category, count)
+        SELECT updated_date, category, COUNT(*) FROM {table_name}_categories {where_sql}
+        GROUP BY updated_date, category
+        """,
+        params,
+    )
+    if touched is not None:
+        cursor.execute(touched_sql, params)
+        touched.update(row[0] for row in cursor.fetchall())
+    refresh_category_totals(cursor, table_name, touched)
 
-    records = [(article.title, article.summary, article.published, 
-                ",".join(article.authors), ",".join(article.categories), article.comment, 
-                article.doi, article.entry_id, article.journal_ref, 
-                ",".join(article.links), article.primary_category, article.updated, 
-                article.CN_title, article.CN_summary) for article in articles]
+def refresh_category_totals(cursor, table_name, categories=None):
+    """
+    从按天汇总表重算分类的全部时间总数，categories为None时全部重算。
+    按分类求和走(category, count)索引，只读取这些分类有文章的日期行。
+    """
+    if categories is not None and not categories:
+        return
+    where_sql = ""
+    params = []
+    if categories is not None:
+        params = sorted(categories)
+        where_sql = f"WHERE category IN ({', '.join(['%s'] * len(params))})"
+    cursor.execute(f"DELETE FROM {table_name}_category_totals {where_sql}", params)
+    cursor.execute(
+        f"""
+        INSERT INTO {table_name}_category_totals (category, count)
+        SELECT category, SUM(count) FROM {table_name}_category_counts {where_sql}
+        GROUP BY category
+        """,
+        params,
+    )
 
-    config = Config()
-    db = Database(config.db_config())
+def bump_data_version(cursor, table_name, days=None):
+    """
+    递增数据版本号：global以及涉及的每一天（YYYY-MM-DD）。days为None时递增所有有文章的日期。
+    API的响应缓存以版本号为键的一部分，版本变化后旧的缓存自然失效。
+    """
+    upsert = f"INSERT INTO {table_name}_versions (scope, version) VALUES (%s, 1) ON DUPLICATE KEY UPDATE version = version + 1"
+    if days is None:
+        cursor.execute(
+            f"""
+            INSERT INTO {table_name}_versions (scope, version)
+            SELECT DISTINCT CAST(updated_date AS CHAR), 1 FROM {table_name}_category_counts
+            ON DUPLICATE KEY UPDATE version = version + 1
+            """
+        )
+        cursor.execute(upsert, ("global",))
+        return
+    cursor.executemany(upsert, [("global",)] + [(day.strftime("%Y-%m-%d"),) for day in sorted(days)])
 
+def backfill_categories(ctx, batch_size=5000):
+    """
+    回填分类关联表：按id顺序分批读取已有文章，把逗号拼接的categories字段拆开写入{table_name}_categories。
+    重复执行是安全的（INSERT IGNORE），中断后重新运行即可。
+    """
+    table_name = ctx.table_name
+    conn = ctx.db.get_connection()
     try:
-        conn = db.get_connection()
         cursor = conn.cursor()
-        cursor.executemany(insert_query, records)
+        last_id = 0
+        total = 0
+        while True:
+            cursor.execute(
+                f"SELECT id, categories, updated_date FROM {table_name} WHERE id > %s ORDER BY id LIMIT %s",
+                (last_id, batch_size),
+            )
+            batch = cursor.fetchall()
+            if not batch:
+                break
+            rows = [
+                (article_id, category.strip(), updated_date)
+                for article_id, categories, updated_date in batch
+                for category in (categories or "").split(",") if category.strip()
+            ]
+            if rows:
+                cursor.executemany(
+                    f"INSERT IGNORE INTO {table_name}_categories (article_id, category, updated_date) VALUES (%s, %s, %s)",
+                    rows,
+                )
+            conn.commit()
+            last_id = batch[-1][0]
+            total += len(batch)
+            print(f"已回填{total}篇文章的分类（当前id {last_id}）。")
+        refresh_category_counts(cursor, table_name)
+        bump_data_version(cursor, table_name)
         conn.commit()
-        print(f"{cursor.rowcount} records inserted.")
-    except Error as e:
-        print(e)
-        conn.rollback()
+        print("分类计数汇总表已重建。")
+        cursor.close()
     finally:
+        conn.close()
+
+def dedup_versions(ctx, dry_run=False):
+    """
+    清理同一篇论文的多个版本（包括重复的entry_id）：每个paper_id只保留updated最新的一行，连同分类和向量，之后重建分类计数。
+    """
+    table_name = ctx.table_name
+    conn = ctx.db.get_connection()
+    try:
+        cursor = conn.cursor()
+        # paper_id已由ensure_schema回填
+        older = f"""
+            {table_name} a JOIN {table_name} b
+            ON a.paper_id = b.paper_id AND (a.updated < b.updated OR (a.updated = b.updated AND a.id < b.id))
+        """
+        cursor.execute(f"SELECT COUNT(DISTINCT a.id) FROM {older}")
+        count = cursor.fetchone()[0]
+        print(f"{table_name}中有{count}行是同一篇论文的旧版本或重复记录{'（dry run，未删除）' if dry_run else '，将被删除'}。")
+        if dry_run or not count:
+            cursor.close()
+            return count
+        cursor.execute(f"DELETE a FROM {older}")
+        cursor.execute(f"DELETE c FROM {table_name}_categories c LEFT JOIN {table_name} a ON a.id = c.article_id WHERE a.id IS NULL")
+        cursor.execute(f"DELETE e FROM {table_name}_embeddings e LEFT JOIN {table_name} a ON a.id = e.article_id WHERE a.id IS NULL")
+        refresh_category_counts(cursor, table_name)
+        bump_data_version(cursor, table_name)
+        conn.commit()
+        print(f"已删除{count}行，分类计数汇总表已重建。")
+        cursor.close()
+    finally:
+        conn.close()
+    return count
+
+def write_embeddings(cursor, table_name, rows, embedder):
+    """
+    为rows（(article_id, 标题, 摘要)）计算向量并写入{table_name}_embeddings。
+    使用REPLACE：已有向量的文章会分配新的seq，API增量同步时能看到更新。
+    """
+    vectors = embedder.embed([f"{title}\n{summary or ''}" for _, title, summary in rows])
+    cursor.executemany(
+        f"REPLACE INTO {table_name}_embeddings (article_id, model, dim, vector) VALUES (%s, %s, %s, %s)",
+        [(article_id, embedder.name, len(vector), pack_vector(vector)) for (article_id, _, _), vector in zip(rows, vectors)],
+    )
+
+def store_embeddings(db, table_name, articles, embedder, chunk_size=500):
+    """
+    为刚入库的文章计算并保存向量。失败只打印提示，不影响已入库的文章，之后可以用backfill-embeddings补齐。
+    """
+    conn = None
+    cursor = None
+    try:
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        entry_ids = [article.entry_id for article in articles]
+        by_entry = {article.entry_id: article for article in articles}
+        rows = []
+        for start in range(0, len(entry_ids), chunk_size):
+            chunk = entry_ids[start:start + chunk_size]
+            placeholders = ", ".join(["%s"] * len(chunk))
+            cursor.execute(f"SELECT id, entry_id FROM {table_name} WHERE entry_id IN ({placeholders})", chunk)
+            rows.extend((article_id, by_entry[entry_id].title, by_entry[entry_id].summary) for article_id, entry_id in cursor.fetchall())
+        if rows:
+            write_embeddings(cursor, table_name, rows, embedder)
+            conn.commit()
+    except Exception as e:
+        print(f"计算文章向量失败：{e}，之后可以用backfill-embeddings补齐。")
+        if conn is not None:
+            try:
+                conn.rollback()
+            except Error:
+                pass
+    finally:
+        if cursor is not None:
+            cursor.close()
+        if conn is not None:
+            conn.close()
+
+def backfill_embeddings(ctx, batch_size=500):
+    """
+    补齐向量：按id顺序分批找出还没有当前模型向量的文章并计算。更换模型或维度后运行一次即可全部重算。
+    重复执行是安全的，中断后重新运行即可。
+    """
+    table_name, embedder = ctx.table_name, ctx.embedder
+    conn = ctx.db.get_connection()
+    try:
+        cursor = conn.cursor()
+        last_id = 0
+        total = 0
+        while True:
+            cursor.execute(
+                f"""
+                SELECT a.id, a.title, a.summary FROM {table_name} a
+                LEFT JOIN {table_name}_embeddings e ON e.article_id = a.id AND e.model = %s
+                WHERE a.id > %s AND e.article_id IS NULL
+                ORDER BY a.id LIMIT %s
+                """,
+                (embedder.name, last_id, batch_size),
+            )
+            batch = cursor.fetchall()
+            if not batch:
+                break
+            write_embeddings(cursor, table_name, batch, embedder)
+            conn.commit()
+            last_id = batch[-1][0]
+            total += len(batch)
+            print(f"已计算{total}篇文章的向量（当前id {last_id}）。")
         cursor.close()
+    finally:
         conn.close()
 
-def daily_task():
+def backfill(ctx, start, end, categories, window_days=1, workers=3):
+    """
+    历史回填：把[start, end]按提交日期切成窗口并发抓取，抓到的文章交给正常的处理管道，处理完的窗口记入断点。
+    """
+    workers = max(1, workers)
+    spacer = RequestSpacer(ctx.config.arxiv_delay_seconds())
+    checkpoints = BackfillCheckpoints(ctx.config.state_path())
+    windows = [(first, last, submitted_query(categories, first, last)) for first, last in date_windows(start, end, window_days)]
+    todo = iter([window for window in windows if not checkpoints.done(window[2])])
+    print(f"回填{', '.join(categories)}（{start} ~ {end}）：共{len(windows)}个窗口，"
+          f"已完成{sum(1 for window in windows if checkpoints.done(window[2]))}个。")
+
+    totals = {"windows": 0, "fetched": 0, "inserted": 0, "failed": 0}
+    pending = {}
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            def submit_next():
+                window = next(todo, None)
+                if window is not None:
+                    pending[executor.submit(fetch_window, window[2], spacer)] = window
+
+            for _ in range(workers):
+                submit_next()
+            while pending:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    first, last, query = pending.pop(future)
+                    submit_next()  # 处理这个窗口的同时继续抓取下一个
+                    try:
+                        articles = future.result()
+                    except Exception as e:
+                        print(f"窗口{first} ~ {last}抓取失败：{e}，下次运行时重试。")
+                        continue
+                    stats = run_pipeline(ctx, iter(articles))
+                    totals["windows"] += 1
+                    for key in ("fetched", "inserted", "failed"):
+                        totals[key] += stats[key]
+                    # 有失败的文章时，只有交给了任务账本重试才能把窗口记为完成
+                    if stats["failed"] == 0 or ctx.ledger is not None:
+                        checkpoints.mark_done(query, stats["fetched"], stats["inserted"])
+                    print(f"窗口{first} ~ {last}：抓取{stats['fetched']}篇，新文章{stats['new']}篇，"
+                          f"成功更新{stats['inserted']}篇，失败{stats['failed']}篇。")
+    finally:
+        checkpoints.close()
+    print(f"回填结束：处理{totals['windows']}个窗口，抓取{totals['fetched']}篇，成功更新{totals['inserted']}篇，失败{totals['failed']}篇。")
+    return totals
+
+def daily_task(ctx):
     """
-    定义定时任务要执行的操作。对配置文件中指定的每个文章分类，调用`fetch_process_insert_articles`函数进行文章的抓取、处理和插入操作。
+    定义定时任务要执行的操作。对配置文件中指定的文章分类调用`fetch_process_insert_articles`函数进行文章的抓取、处理和插入操作。
     """
-    config = Config()
-    for category in config.categories():
-        fetch_process_insert_articles(category, config.articles_table(), config.max_results())
+    config = ctx.config
+    categories = config.categories()
+    ctx.cache.reset_stats()
+    if ctx.ledger is not None:
+        resume_from_ledger(ctx)  # 先完成上次中断或失败的文章
+    if config.harvest_mode() == 'per_category':
+        for category in categories:
+            fetch_process_insert_articles(ctx, category, config.max_results())
+    else:
+        cap = config.max_results() * len(categories)
+        stats = fetch_process_insert_articles(ctx, categories, cap)
+        # 没有高水位时文章多的分类可能占满合并查询的上限；补充抓取不读写高水位，否则之后的补充抓取不再受max_results限制
+        if stats is not None and stats["capped"]:
+            print(f"合并查询达到上限{cap}篇，逐个分类补充抓取。")
+            for category in categories:
+                fetch_process_insert_articles(ctx, f"cat:{category}", config.max_results(), incremental=False)
+    print(ctx.cache.report())  # 本次运行的缓存命中情况
+    ctx.cache.prune()
+    if ctx.ledger is not None:
+        ctx.ledger.prune()
 
 # 主程序流程
 if __name__ == "__main__":
-    config = Config()
-    frequency_hours = config.fetch_frequency()  # 获取收录频率
-    print(f"当前本地时间: {datetime.now()}")
-    daily_task()
-    schedule.every(frequency_hours).hours.do(daily_task)
+    parser = argparse.ArgumentParser(description="Arxiv Day 文章收录")
+    parser.add_argument("mode", nargs="?", default="run", choices=["run", "backfill", "backfill-categories", "backfill-embeddings", "dedup-versions"],
+                        help="run：定时收录（默认）；backfill：按提交日期收录历史文章；backfill-categories：把已有文章的categories拆分回填到分类关联表；"
+                             "backfill-embeddings：为还没有向量的已有文章计算向量；dedup-versions：删除同一篇论文的旧版本和重复记录")
+    parser.add_argument("--batch-size", type=int, default=None, help="回填时每批读取的文章数（分类默认5000，向量默认500）")
+    parser.add_argument("--start", type=lambda value: datetime.strptime(value, "%Y-%m-%d").date(), help="backfill的开始日期（YYYY-MM-DD）")
+    parser.add_argument("--end", type=lambda value: datetime.strptime(value, "%Y-%m-%d").date(), help="backfill的结束日期（含，默认今天）")
+    parser.add_argument("--categories", default=None, help="backfill的分类，逗号分隔（默认使用配置文件中的categories）")
+    parser.add_argument("--window-days", type=int, default=None, help="backfill每个查询窗口的天数")
+    parser.add_argument("--workers", type=int, default=None, help="backfill同时抓取的窗口数")
+    parser.add_argument("--dry-run", action="store_true", help="dedup-versions只统计要删除的行数，不删除")
+    args = parser.parse_args()
+    if args.mode == "backfill" and args.start is None:
+        parser.error("backfill需要--start")
 
-    while True:
-        # 获取当前UTC时间
+    ctx = HarvesterContext(Config())  # 整个进程只创建一次，所有定时任务共享
+    ctx.db.ensure_schema(ctx.table_name)  # 补齐索引等表结构
+    try:
+        if args.mode == "backfill-categories":
+            backfill_categories(ctx, args.batch_size or 5000)
+            raise SystemExit(0)
+        if args.mode == "dedup-versions":
+            if dedup_versions(ctx, args.dry_run) and not args.dry_run:
+                ctx.db.ensure_schema(ctx.table_name)  # 清理后补上唯一索引
+            raise SystemExit(0)
+        if not ctx.db.has_unique_index(ctx.table_name, "entry_id"):
+            raise SystemExit(f"{ctx.table_name}.entry_id没有唯一索引，无法去重和upsert。确认后运行 python3 arxiv_auto.py dedup-versions 清理重复记录。")
+        if args.mode == "backfill":
+            categories = [c.strip() for c in args.categories.split(",") if c.strip()] if args.categories else ctx.config.categories()
+            backfill(
+                ctx, args.start, args.end or datetime.now().date(), categories,
+                args.window_days or ctx.config.backfill_window_days(), args.workers or ctx.config.backfill_workers()
+            )
+            raise SystemExit(0)
+        if args.mode == "backfill-embeddings":
+            if ctx.embedder is None:
+                print("[embeddings] enabled=false，未计算向量。")
+            else:
+                backfill_embeddings(ctx, args.batch_size or 500)
+            raise SystemExit(0)
+
+        frequency_hours = ctx.config.fetch_frequency()  # 获取收录频率
         print(f"当前本地时间: {datetime.now()}")
-        # 运行所有可以运行的任务
-        schedule.run_pending()
-        time.sleep(60)  # 暂停一分钟
\ No newline at end of file
+        daily_task(ctx)
+        schedule.every(frequency_hours).hours.do(daily_task, ctx)
+
+        while True:
+            # 获取当前UTC时间
+            print(f"当前本地时间: {datetime.now()}")
+            # 运行所有可以运行的任务
+            schedule.run_pending()
+            time.sleep(60)  # 暂停一分钟
+    finally:
+        ctx.close()
\ No newline at end of file
@@ -0,0 +1,132 @@
+"""
+本地的假OpenAI兼容服务，用于在不花钱、不联网的情况下检查并发翻译：限流、退避重试、批量翻译的拆分和解析。
+只实现/v1/chat/completions：批量翻译请求按id返回"[译]"开头的标题和摘要，逐篇翻译请求原样加上"[译]"返回。
+
+默认启动服务后用ChatGPTModel.translate_batch和iter_translated翻译一批假文章，检查每篇都翻译成功：
+    python fake_openai.py --articles 40 --latency 0.2 --fail-rate 0.2
+只启动服务（配合config.ini中的base_url=http://127.0.0.1:8765/v1运行arxiv_auto.py）：
+    python fake_openai.py --serve --port 8765
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import argparse
+import json
+import random
+import threading
+import time
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        with server.lock:
+            server.requests += 1
+            server.in_flight += 1
+            server.peak_in_flight = max(server.peak_in_flight, server.in_flight)
+        try:
+            time.sleep(server.latency)
+            if not self.path.endswith("/chat/completions"):
+                self.reply(404, {"error": {"message": f"unknown path {self.path}", "type": "invalid_request_error"}})
+            elif random.random() < server.fail_rate:
+                with server.lock:
+                    server.rejected += 1
+                self.reply(429, {"error": {"message": "rate limited", "type": "rate_limit_error"}}, {"retry-after-ms": "50"})
+            else:
+                content = completion_content(body["messages"])
+                self.reply(200, {
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "fake"),
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+                })
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def reply(self, status, payload, headers=None):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+def completion_content(messages):
+    """
+    批量翻译请求（带system指令，user为JSON数组）返回{"translations": [...]}，其余请求返回加了"[译]"的原文。
+    """
+    message = messages[-1]["content"]
+    if messages[0]["role"] != "system":
+        return f"[译]{message}"
+    items = json.loads(message)
+    return json.dumps({"translations": [
+        {"id": item["id"], "CN_title": f"[译]{item['title']}", "CN_summary": f"[译]{item['summary']}"} for item in items
+    ]}, ensure_ascii=False)
+
+def start_server(port=0, latency=0.0, fail_rate=0.0):
+    """
+    在后台线程中启动假服务，返回server（server.server_address[1]为实际端口）。
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), FakeOpenAIHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.latency, server.fail_rate = latency, fail_rate
+    server.requests = server.rejected = server.in_flight = server.peak_in_flight = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def check(server, articles, concurrency, batch_size, requests_per_minute):
+    """
+    用ChatGPTModel对假服务做一次批量翻译和一次并发翻译，返回是否全部成功。
+    """
+    from arxiv_auto import Article, ChatGPTModel, RateLimiter, iter_translated
+
+    model = ChatGPTModel(
+        api_key="fake", base_url=f"http://127.0.0.1:{server.server_address[1]}/v1",
+        rate_limiter=RateLimiter(requests_per_minute), max_retries=8
+    )
+    items = [{"id": f"fake-{i}", "title": f"Title {i}", "summary": f"Summary {i}"} for i in range(batch_size)]
+    translations = model.translate_batch(items)
+    ok = all(translations.get(item["id"]) == (f"[译]{item['title']}", f"[译]{item['summary']}") for item in items)
+    print(f"translate_batch：{len(translations)}/{len(items)}篇{'正确' if ok else '有误'}。")
+
+    fake_articles = [
+        Article(entry_id=f"http://arxiv.org/abs/fake.{i:05d}v1", title=f"Title {i}", summary=f"Summary {i}")
+        for i in range(articles)
+    ]
+    started = time.monotonic()
+    results = list(iter_translated(iter(fake_articles), model, concurrency, batch_size))
+    translated = sum(1 for article, done in results if done and article.CN_title == f"[译]{article.title}")
+    print(f"iter_translated：{translated}/{articles}篇成功，用时{time.monotonic() - started:.1f}秒；"
+          f"服务端共收到{server.requests}个请求（其中{server.rejected}个返回429），最多{server.peak_in_flight}个同时在途。")
+    model.client.close()
+    return ok and translated == articles
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="本地的假OpenAI兼容服务")
+    parser.add_argument("--serve", action="store_true", help="只启动服务，不做检查")
+    parser.add_argument("--port", type=int, default=0, help="监听端口（默认随机）")
+    parser.add_argument("--latency", type=float, default=0.2, help="每个请求的响应延迟（秒）")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="随机返回429的比例，用于检查退避重试")
+    parser.add_argument("--articles", type=int, default=20, help="检查时翻译的文章数")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=5)
+    parser.add_argument("--requests-per-minute", type=int, default=0)
+    args = parser.parse_args()
+
+    server = start_server(args.port, args.latency, args.fail_rate)
+    if args.serve:
+        print(f"假OpenAI服务：http://127.0.0.1:{server.server_address[1]}/v1")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+    else:
+        passed = check(server, args.articles, args.concurrency, args.batch_size, args.requests_per_minute)
+        raise SystemExit(0 if passed else 1)
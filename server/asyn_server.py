@@ -1,7 +1,15 @@
 import os
 import json
+import argparse
+import asyncio
+import gzip
+import hashlib
+import threading
+import time
 import configparser
+from collections import OrderedDict
 from datetime import datetime
+from urllib.parse import urlencode
 
 import aiohttp
 import aiohttp_jinja2
@@ -37,53 +45,375 @@ class Config:
             raise RuntimeError("API key not configured")
         return key
 
+    def articles_page_size(self) -> int:
+        return self.config.getint("api", "page_size", fallback=200)
 
-async def api_get(app, path: str, params=None):
-    """Call data API and return JSON, raising 502 on failure."""
-    session: aiohttp.ClientSession = app["http_session"]
+    def api_timeout(self) -> float:
+        return self.config.getfloat("api", "timeout_seconds", fallback=10.0)
+
+    def static_ttl(self) -> float:
+        return self.config.getfloat("api", "static_ttl_seconds", fallback=300.0)
+
+    def page_cache_bytes(self) -> int:
+        return self.config.getint("cache", "max_mb", fallback=64) * 1024 * 1024
+
+    def spill_dir(self):
+        return self.config.get("cache", "spill_dir", fallback="") or None
+
+    def spill_max_bytes(self) -> int:
+        return self.config.getint("cache", "spill_max_mb", fallback=512) * 1024 * 1024
+
+    def version_poll_seconds(self) -> float:
+        return self.config.getfloat("cache", "version_poll_seconds", fallback=30.0)
+
+    def prerender_days(self) -> int:
+        return self.config.getint("cache", "prerender_days", fallback=7)
+
+    def past_max_age(self) -> int:
+        return self.config.getint("cache", "past_max_age", fallback=3600)
+
+    def slice_size(self) -> int:
+        return self.config.getint("server", "slice_size", fallback=50)
+
+    def static_dir(self) -> str:
+        return self.config.get("static", "out_dir", fallback="site")
+
+    def static_workers(self) -> int:
+        return self.config.getint("static", "workers", fallback=4)
+
+
+# Responses that came with an ETag (e.g. /articles) are kept for conditional requests
+API_CACHE_ENTRIES = 64
+
+
+async def api_get(app, path: str, params=None, ttl: float = None):
+    """Call data API and return JSON, raising 502 on failure and 504 after the API timeout.
+
+    With ttl the JSON is kept in memory for that many seconds (for config-like
+    responses such as /categories). Identical concurrent calls share one upstream
+    request, so a burst of page views for the same data costs a single API call.
+    """
     base = app["api_base"]
     url = f"{base}{path}" if path.startswith("/") else f"{base}/{path}"
+    key = (url, tuple(sorted((params or {}).items())))
+    if ttl:
+        entry = app["ttl_cache"].get(key)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+
+    inflight = app["inflight"]
+    task = inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(fetch_api(app, url, params, key))
+        inflight[key] = task
+
+        def done(finished):
+            inflight.pop(key, None)
+            if not finished.cancelled():
+                finished.exception()  # retrieved here in case every caller already timed out
+
+        task.add_done_callback(done)
     try:
-        async with session.get(url, params=params) as resp:
+        # shield: one caller timing out must not cancel the request the others wait on
+        data = await asyncio.wait_for(asyncio.shield(task), app["config"].api_timeout())
+    except asyncio.TimeoutError as exc:
+        raise web.HTTPGatewayTimeout(reason=f"API request timed out: {path}") from exc
+    if ttl:
+        app["ttl_cache"][key] = (time.monotonic() + ttl, data)
+    return data
+
+
+async def fetch_api(app, url: str, params, key):
+    """One upstream GET. Responses carrying an ETag are kept in a small LRU; later calls
+    for the same URL send If-None-Match and reuse the cached JSON when the API answers 304."""
+    session: aiohttp.ClientSession = app["http_session"]
+    api_cache: OrderedDict = app["api_cache"]
+    cached = api_cache.get(key)
+    headers = {"If-None-Match": cached[0]} if cached else None
+    try:
+        async with session.get(url, params=params, headers=headers) as resp:
+            if resp.status == 304 and cached:
+                api_cache.move_to_end(key)
+                return cached[1]
             if resp.status != 200:
                 text = await resp.text()
                 raise web.HTTPBadGateway(reason=f"API {resp.status}: {text}")
-            return await resp.json()
+            data = await resp.json()
+            etag = resp.headers.get("ETag")
+            if etag:
+                api_cache[key] = (etag, data)
+                api_cache.move_to_end(key)
+                while len(api_cache) > API_CACHE_ENTRIES:
+                    api_cache.popitem(last=False)
+            return data
     except Exception as exc:
         raise web.HTTPBadGateway(reason=f"API request failed: {exc}") from exc
 
 
 def parse_updated_field(items):
-    """Convert string timestamps to datetime for template strftime usage."""
+    """Convert string timestamps to datetime for template strftime usage.
+
+    Returns new dicts so JSON kept by api_get for conditional requests is not mutated.
+    """
+    parsed = []
     for item in items:
         ts = item.get("updated")
         if ts and isinstance(ts, str):
             ts_clean = ts.rstrip("Z")
             try:
-                item["updated"] = datetime.fromisoformat(ts_clean)
+                item = {**item, "updated": datetime.fromisoformat(ts_clean)}
             except Exception:
                 pass
-    return items
+        parsed.append(item)
+    return parsed
+
+
+class PageCache:
+    """Rendered pages keyed by (route, date, data version), each stored with an ETag and
+    its identity and gzip bodies, in an LRU bounded by bytes. With a spill directory,
+    evicted pages are written there (gzip only) and promoted back on the next hit.
+    The ETag hashes the rendered body, so a template change never revalidates a stale
+    copy. put and load_spilled run in worker threads, so the bookkeeping is locked."""
+
+    def __init__(self, max_bytes: int, spill_dir: str = None, spill_max_bytes: int = 0):
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # key -> entry dict
+        self.bytes = 0
+        self.spill_dir = spill_dir
+        self.spill_max_bytes = spill_max_bytes
+        self.spilled = OrderedDict()  # file name -> size, oldest first
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+            files = sorted(os.scandir(spill_dir), key=lambda f: f.stat().st_mtime)
+            for f in files:
+                self.spilled[f.name] = f.stat().st_size
+
+    @staticmethod
+    def spill_name(key) -> str:
+        return hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:24] + ".html.gz"
+
+    @staticmethod
+    def entry(body: bytes, compressed: bytes, etag=True) -> dict:
+        tag = hashlib.sha1(body).hexdigest()[:24] if etag else None
+        return {"etag": tag, "identity": body, "gzip": compressed, "size": len(body) + len(compressed)}
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def has_spilled(self, key) -> bool:
+        """Whether load_spilled can find key, checked without touching the disk."""
+        if not self.spill_dir:
+            return False
+        with self.lock:
+            return self.spill_name(key) in self.spilled
+
+    def load_spilled(self, key):
+        """Blocking: read an evicted page back from disk and keep it in memory again."""
+        if not self.has_spilled(key):
+            return None
+        name = self.spill_name(key)
+        try:
+            with open(os.path.join(self.spill_dir, name), "rb") as f:
+                compressed = f.read()
+        except OSError:
+            with self.lock:
+                self.spilled.pop(name, None)
+            return None
+        return self._store(key, self.entry(gzip.decompress(compressed), compressed))
+
+    def put(self, key, html: str):
+        """Blocking (compresses, may spill): wrap a rendered page; key None is not stored."""
+        body = html.encode("utf-8")
+        compressed = gzip.compress(body, compresslevel=6)
+        if key is None:
+            return self.entry(body, compressed, etag=False)
+        return self._store(key, self.entry(body, compressed))
+
+    def _store(self, key, entry: dict):
+        evicted = []
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old["size"]
+            self.entries[key] = entry
+            self.bytes += entry["size"]
+            while self.bytes > self.max_bytes and len(self.entries) > 1:
+                evicted_key, evicted_entry = self.entries.popitem(last=False)
+                self.bytes -= evicted_entry["size"]
+                evicted.append((evicted_key, evicted_entry))
+        for evicted_key, evicted_entry in evicted:
+            self._spill(evicted_key, evicted_entry)
+        return entry
+
+    def _spill(self, key, entry):
+        if not self.spill_dir:
+            return
+        name = self.spill_name(key)
+        try:
+            with open(os.path.join(self.spill_dir, name), "wb") as f:
+                f.write(entry["gzip"])
+        except OSError:
+            return
+        removed = []
+        with self.lock:
+            self.spilled.pop(name, None)
+            self.spilled[name] = len(entry["gzip"])
+            while sum(self.spilled.values()) > self.spill_max_bytes and len(self.spilled) > 1:
+                old_name, _ = self.spilled.popitem(last=False)
+                removed.append(old_name)
+        for old_name in removed:
+            try:
+                os.remove(os.path.join(self.spill_dir, old_name))
+            except OSError:
+                pass
 
 
-async def index(request):
-    app = request.app
-    latest_resp = await api_get(app, "/latest")
+async def run_blocking(fn, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, fn, *args)
+
+
+def normalize_date(value):
+    """YYYY-MM-DD form of a date query param, or None when missing or malformed."""
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").strftime("%Y-%m-%d") if value else None
+    except ValueError:
+        return None
+
+
+def page_key(app, route: str, date: str = None, variant=None):
+    """Cache key for a page at the current data version, or None (no caching) before the
+    first successful /version poll or while the API cannot read its versions. A day's
+    page only changes when that day's version does. variant distinguishes views of the
+    same page (category filter, cursor)."""
+    versions = app["versions"]
+    if versions.get("global") is None:
+        return None
+    version = versions.get("days", {}).get(date, 0) if date else versions.get("global")
+    return (route, date, version) if variant is None else (route, date, version, variant)
+
+
+def page_max_age(app, date: str) -> int:
+    # A past day's page only changes if an article on it gets a new arXiv version
+    latest = app["versions"].get("latest_date")
+    return app["config"].past_max_age() if date and latest and date < latest else 0
+
+
+def selected_categories(request) -> tuple:
+    """category query param (repeated or comma separated) as a canonical sorted tuple."""
+    values = request.query.getall("category", [])
+    return tuple(sorted({cat.strip() for value in values for cat in value.split(",") if cat.strip()}))
+
+
+def fragment_url(date: str, categories: tuple, after: str) -> str:
+    params = [("date", date)] + [("category", cat) for cat in categories] + [("after", after)]
+    return f"/articles/fragment?{urlencode(params)}"
+
+
+async def cached_page(app, key, render):
+    """Return the page entry for key, rendering it on a miss. Concurrent misses for the
+    same key share one render."""
+    cache: PageCache = app["page_cache"]
+    if key is None:
+        return await run_blocking(cache.put, None, await render())
+    entry = cache.get(key)
+    if entry is None and cache.has_spilled(key):
+        entry = await run_blocking(cache.load_spilled, key)
+    if entry is not None:
+        return entry
+    renders = app["renders"]
+    task = renders.get(key)
+    if task is None:
+        async def build():
+            return await run_blocking(cache.put, key, await render())
+
+        task = asyncio.ensure_future(build())
+        renders[key] = task
+        task.add_done_callback(lambda _: renders.pop(key, None))
+    return await asyncio.shield(task)
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison (RFC 9110) of each tag in the If-None-Match list against etag."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """Whether gzip gets a nonzero q value; an explicit gzip entry overrides *."""
+    qualities = {}
+    for part in (accept_encoding or "").split(","):
+        coding, *params = part.split(";")
+        coding = coding.strip().lower()
+        if coding not in ("gzip", "*"):
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qualities[coding] = q
+    return qualities.get("gzip", qualities.get("*", 0.0)) > 0
+
+
+def page_response(request, entry, max_age: int = 0):
+    # Identity and gzip bodies are different bytes, so each gets its own strong tag
+    encoding = "gzip" if accepts_gzip(request.headers.get("Accept-Encoding")) else "identity"
+    headers = {"Vary": "Accept-Encoding"}
+    headers["Cache-Control"] = f"public, max-age={max_age}" if max_age else "no-cache"
+    if entry["etag"]:
+        headers["ETag"] = f'"{entry["etag"]}"' if encoding == "identity" else f'"{entry["etag"]}-gzip"'
+        if etag_matches(request.headers.get("If-None-Match"), headers["ETag"]):
+            return web.Response(status=304, headers=headers)
+    body = entry["identity"]
+    if encoding == "gzip":
+        headers["Content-Encoding"] = "gzip"
+        body = entry["gzip"]
+    return web.Response(body=body, content_type="text/html", charset="utf-8", headers=headers)
+
+
+async def render_html(app, template: str, context: dict) -> str:
+    """Render a template without a request (none of the templates use it) in a worker
+    thread, so a large article page does not block the event loop."""
+    env = aiohttp_jinja2.get_env(app)
+    return await run_blocking(lambda: env.get_template(template).render(context))
+
+
+async def render_index(app) -> str:
+    latest_resp, categories_resp, counts_resp = await asyncio.gather(
+        api_get(app, "/latest"),
+        api_get(app, "/categories", ttl=app["config"].static_ttl()),
+        api_get(app, "/categories/counts", params={"all_time": "true"}),
+    )
     latest_update = latest_resp.get("date")
     count = latest_resp.get("count", 0)
-
-    categories_resp = await api_get(app, "/categories")
     categories = categories_resp.get("categories", [])
 
-    counts_resp = await api_get(app, "/categories/counts", params={"all_time": "true"})
     categories_info = {item["category"]: item.get("count", 0) for item in counts_resp.get("items", [])}
     for cat in categories:
         categories_info.setdefault(cat, 0)
     total_collection = sum(categories_info.values())
 
-    return aiohttp_jinja2.render_template(
+    return await render_html(
+        app,
         "index.html",
-        request,
         {
             "title": "Arxiv Day",
             "latest_update": latest_update,
@@ -94,50 +424,93 @@ async def index(request):
     )
 
 
-async def handle_404(request):
-    return aiohttp_jinja2.render_template("404.html", request, {}, status=404)
-
+def article_params(date, categories: tuple, page_size: int) -> dict:
+    params = {"page_size": page_size}
+    if date:
+        params["date"] = date
+    if categories:
+        params["category"] = ",".join(categories)
+    return params
 
-async def article_handler(request):
-    app = request.app
-    selected_date = request.query.get("date")
 
-    categories_resp = await api_get(app, "/categories")
-    categories = categories_resp.get("categories", [])
+async def render_articles(app, selected_date=None, categories: tuple = (), lazy: bool = True) -> str:
+    """Article page for a day. lazy renders only the first slice and leaves a sentinel the
+    page uses to fetch the next one (/articles/fragment) while scrolling, so the page costs
+    what is on screen. Otherwise (static builds) the whole day is walked with the cursor."""
+    cfg = app["config"]
+    params = article_params(selected_date, categories, cfg.slice_size() if lazy else cfg.articles_page_size())
+    if not lazy:
+        params["include_total"] = "false"
 
-    # Fetch a large batch (API has no enforced upper cap now)
-    params = {"page_size": 1000}
-    if selected_date:
-        params["date"] = selected_date
+    categories_resp, articles_resp = await asyncio.gather(
+        api_get(app, "/categories", ttl=cfg.static_ttl()),
+        api_get(app, "/articles", params=params),
+    )
+    all_categories = categories_resp.get("categories", [])
+    date = articles_resp.get("date")
 
-    articles_resp = await api_get(app, "/articles", params=params)
     articles = parse_updated_field(articles_resp.get("items", []))
-
-    return aiohttp_jinja2.render_template(
+    total = articles_resp.get("total")
+    next_cursor = articles_resp.get("next_cursor")
+    while next_cursor and not lazy:
+        # Pin the resolved date so a harvest landing mid-walk cannot switch "latest"
+        params = {**params, "date": date, "after": next_cursor}
+        articles_resp = await api_get(app, "/articles", params=params)
+        articles.extend(parse_updated_field(articles_resp.get("items", [])))
+        next_cursor = articles_resp.get("next_cursor")
+    if not lazy:
+        total = len(articles)
+
+    return await render_html(
+        app,
         "article.html",
-        request,
         {
             "title": "Arxiv: TODAY" if not selected_date else f"Arxiv: {selected_date}",
-            "categories": json.dumps(categories),
+            "categories": json.dumps(all_categories),
+            "selected_categories": list(categories),
+            "date": date,
+            "lazy": lazy,
             "articles": articles,
+            "total": total,
+            "next_url": fragment_url(date, categories, next_cursor) if next_cursor else None,
             "path": "",
         },
     )
 
 
-async def calendar_handler(request):
-    app = request.app
+async def render_fragment(app, date: str, categories: tuple, after: str = None) -> str:
+    """One slice of article containers (article_items.html), ending with the sentinel for
+    the slice after it. The first slice (no cursor) also carries the filtered total."""
+    params = article_params(date, categories, app["config"].slice_size())
+    if after:
+        params["after"] = after
+        params["include_total"] = "false"
+    articles_resp = await api_get(app, "/articles", params=params)
+    next_cursor = articles_resp.get("next_cursor")
+    return await render_html(
+        app,
+        "article_items.html",
+        {
+            "articles": parse_updated_field(articles_resp.get("items", [])),
+            "total": articles_resp.get("total"),
+            "next_url": fragment_url(date, categories, next_cursor) if next_cursor else None,
+        },
+    )
+
 
-    categories_resp = await api_get(app, "/categories")
+async def render_calendar(app) -> str:
+    categories_resp, calendar_resp = await asyncio.gather(
+        api_get(app, "/categories", ttl=app["config"].static_ttl()),
+        api_get(app, "/calendar"),
+    )
     categories = categories_resp.get("categories", [])
 
-    calendar_resp = await api_get(app, "/calendar")
     years_with_articles = calendar_resp.get("years", [])
     days_with_articles = calendar_resp.get("days", [])
 
-    return aiohttp_jinja2.render_template(
+    return await render_html(
+        app,
         "calendar.html",
-        request,
         {
             "title": "Arxiv Day: Calendar",
             "categories": categories,
@@ -147,6 +520,83 @@ async def calendar_handler(request):
     )
 
 
+async def index(request):
+    app = request.app
+    entry = await cached_page(app, page_key(app, "index"), lambda: render_index(app))
+    return page_response(request, entry)
+
+
+async def handle_404(request):
+    return aiohttp_jinja2.render_template("404.html", request, {}, status=404)
+
+
+async def article_handler(request):
+    app = request.app
+    selected_date = request.query.get("date")
+    date = normalize_date(selected_date)
+    if selected_date and not date:
+        # Checked here: passed through, the API's 400 would surface as a 502
+        raise web.HTTPBadRequest(reason="date must be YYYY-MM-DD")
+    categories = selected_categories(request)
+    key = page_key(app, "articles", date, categories or None)
+    entry = await cached_page(app, key, lambda: render_articles(app, date, categories))
+    return page_response(request, entry, page_max_age(app, date))
+
+
+async def fragment_handler(request):
+    app = request.app
+    date = normalize_date(request.query.get("date"))
+    if not date:
+        raise web.HTTPBadRequest(reason="date must be YYYY-MM-DD")
+    categories = selected_categories(request)
+    after = request.query.get("after")
+    key = page_key(app, "fragment", date, (categories, after))
+    entry = await cached_page(app, key, lambda: render_fragment(app, date, categories, after))
+    return page_response(request, entry, page_max_age(app, date))
+
+
+async def calendar_handler(request):
+    app = request.app
+    entry = await cached_page(app, page_key(app, "calendar"), lambda: render_calendar(app))
+    return page_response(request, entry)
+
+
+async def watch_versions(app):
+    """Poll the API's /version. When a harvest moved the global version, render the
+    front pages and the recent days whose version changed before anyone asks for them."""
+    cfg = app["config"]
+    while True:
+        try:
+            versions = await api_get(app, "/version")
+            previous = app["versions"]
+            app["versions"] = versions
+            if versions.get("global") not in (None, previous.get("global")):
+                await prerender(app, previous, versions)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            print(f"Version poll failed: {exc}")
+        await asyncio.sleep(cfg.version_poll_seconds())
+
+
+async def prerender(app, previous: dict, versions: dict):
+    old_days = previous.get("days", {})
+    recent = sorted(versions.get("days", {}), reverse=True)[: app["config"].prerender_days()]
+    jobs = [
+        (page_key(app, "index"), lambda: render_index(app)),
+        (page_key(app, "calendar"), lambda: render_calendar(app)),
+        (page_key(app, "articles"), lambda: render_articles(app)),
+    ]
+    for day in recent:
+        if versions["days"][day] != old_days.get(day):
+            jobs.append((page_key(app, "articles", day), lambda day=day: render_articles(app, day)))
+    for key, render in jobs:
+        try:
+            await cached_page(app, key, render)
+        except Exception as exc:
+            print(f"Pre-render of {key} failed: {exc}")
+
+
 async def favorites_handler(request):
     return aiohttp_jinja2.render_template(
         "favorites.html",
@@ -185,10 +635,20 @@ async def init_app():
 
     app["config"] = cfg
     app["api_base"] = cfg.api_base_url()
-    app["http_session"] = aiohttp.ClientSession(headers={"X-API-Key": cfg.api_key()})
+    app["http_session"] = aiohttp.ClientSession(
+        headers={"X-API-Key": cfg.api_key()},
+        timeout=aiohttp.ClientTimeout(total=cfg.api_timeout()),
+    )
+    app["api_cache"] = OrderedDict()
+    app["ttl_cache"] = {}
+    app["inflight"] = {}
+    app["page_cache"] = PageCache(cfg.page_cache_bytes(), cfg.spill_dir(), cfg.spill_max_bytes())
+    app["renders"] = {}
+    app["versions"] = {}
 
     app.router.add_get("/", index)
     app.router.add_get("/articles", article_handler)
+    app.router.add_get("/articles/fragment", fragment_handler)
     app.router.add_get("/calendar", calendar_handler)
     app.router.add_get("/favorites", favorites_handler)
     app.router.add_get("/archive", archive_handler)
@@ -196,14 +656,102 @@ async def init_app():
     app.router.add_get("/storage", storage_handler)  # alias
     app.router.add_get("/{tail:.*}", handle_404)
 
+    async def start_version_watch(app):
+        app["version_watch"] = asyncio.ensure_future(watch_versions(app))
+
     async def close_session(app):
+        app["version_watch"].cancel()
         await app["http_session"].close()
 
+    app.on_startup.append(start_version_watch)
     app.on_cleanup.append(close_session)
     return app
 
 
+def write_page(path: str, html: str):
+    """Write path and path.gz atomically, so a file server never sees a partial page."""
+    body = html.encode("utf-8")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    for target, data in ((path, body), (path + ".gz", gzip.compress(body, compresslevel=9))):
+        tmp = target + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, target)
+
+
+async def build_static(out_dir: str, workers: int, force: bool = False):
+    """Render one page per past day into out_dir. manifest.json keeps the data version
+    each file was rendered at; a later run only re-renders days whose version moved.
+    The latest day is still being harvested and stays dynamic, and so do the index and
+    calendar pages, which change with every harvest."""
+    app = await init_app()
+    manifest_path = os.path.join(out_dir, "manifest.json")
+    manifest = {"global": None, "days": {}}
+    if not force and os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    try:
+        versions, calendar_resp = await asyncio.gather(api_get(app, "/version"), api_get(app, "/calendar"))
+        if versions.get("global") is None:
+            raise RuntimeError("API cannot read its data versions; an incremental build is not possible")
+        app["versions"] = versions
+        latest = versions.get("latest_date")
+        days = [day for day in calendar_resp.get("days", []) if day != latest]
+        day_versions = versions.get("days", {})
+        built = manifest["days"]
+        stale = [day for day in days if built.get(day) != day_versions.get(day, 0)]
+
+        # Left behind by builds that still rendered them; a file server would keep serving them stale
+        for name in ("index.html", "index.html.gz", "calendar.html", "calendar.html.gz"):
+            try:
+                os.remove(os.path.join(out_dir, name))
+            except FileNotFoundError:
+                pass
+
+        semaphore = asyncio.Semaphore(max(1, workers))
+
+        async def build_day(day):
+            async with semaphore:
+                html = await render_articles(app, day, lazy=False)
+                await run_blocking(write_page, os.path.join(out_dir, "articles", f"{day}.html"), html)
+                built[day] = day_versions.get(day, 0)
+
+        results = await asyncio.gather(*(build_day(day) for day in stale), return_exceptions=True)
+        failed = [day for day, result in zip(stale, results) if isinstance(result, Exception)]
+        for day, result in zip(stale, results):
+            if isinstance(result, Exception):
+                print(f"Failed to render {day}: {result}")
+
+        # Drop the latest day and days that disappeared from the calendar
+        for day in set(built) - set(days):
+            built.pop(day)
+            for suffix in (".html", ".html.gz"):
+                try:
+                    os.remove(os.path.join(out_dir, "articles", f"{day}{suffix}"))
+                except FileNotFoundError:
+                    pass
+
+        manifest = {"global": versions.get("global"), "latest_date": latest, "days": built}
+        tmp = manifest_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp, manifest_path)
+        print(f"Static build: {len(stale) - len(failed)} day(s) rendered, {len(failed)} failed, {len(days)} total")
+    finally:
+        await app["http_session"].close()
+
+
 if __name__ == "__main__":
-    port = Config("config.ini").server_port()
-    app = init_app()
-    web.run_app(app, port=port)
+    parser = argparse.ArgumentParser(description="Arxiv Day web server")
+    parser.add_argument("mode", nargs="?", default="serve", choices=["serve", "build-static"],
+                        help="serve: run the web server; build-static: render past days to static files")
+    parser.add_argument("--out", default=None, help="output directory for build-static (default [static] out_dir)")
+    parser.add_argument("--workers", type=int, default=None, help="days rendered concurrently by build-static")
+    parser.add_argument("--force", action="store_true", help="ignore the manifest and re-render everything")
+    args = parser.parse_args()
+
+    config = Config("config.ini")
+    if args.mode == "build-static":
+        asyncio.run(build_static(args.out or config.static_dir(), args.workers or config.static_workers(), args.force))
+    else:
+        web.run_app(init_app(), port=config.server_port())